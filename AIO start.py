@@ -4,6 +4,9 @@ import sys
 # Add tools directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'tools'))
 
+# The menu only asks the questions; every action runs through the CLI
+from cli import main as run_cli
+
 def clear_screen():
     """Clear the terminal screen"""
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -24,8 +27,10 @@ def print_menu():
     print("1. 🚫 Unfollow Non-Mutuals")
     print("2. 👥 Follow Bot (Copy someone's following)")
     print("3. 📊 Account Statistics	")
-    print("4. ⚙️ Settings")
-    print("5. ❌ Exit")
+    print("4. 📈 Offline Statistics (saved lists, no crawl)")
+    print("5. 🔀 Audience Overlap (compare accounts' followers)")
+    print("6. ⚙️ Settings")
+    print("7. ❌ Exit")
     print("-" * 60)
 
 def get_credentials():
@@ -33,10 +38,19 @@ def get_credentials():
     print("\n🔐 LOGIN CREDENTIALS")
     print("-" * 60)
     username = input("Letterboxd Username: ").strip()
+    
+    try:
+        from session import SessionStore
+        has_session = SessionStore().has(username)
+    except ImportError:
+        has_session = False
+    
+    if has_session:
+        print("🔑 Saved session found - leave the password blank to reuse it")
     password = input("Letterboxd Password: ").strip()
     return username, password
 
-def unfollow_tool():
+def unfollow_tool(manager=None):
     """Run the unfollow non-mutuals tool"""
     clear_screen()
     print_header()
@@ -45,27 +59,47 @@ def unfollow_tool():
     
     username, password = get_credentials()
     
+    resume = False
+    try:
+        from journal import find_resumable
+        unfinished = find_resumable(username)
+    except ImportError:
+        unfinished = None
+    if unfinished:
+        print(f"\n📓 An unfollow run was interrupted with {len(unfinished.remaining)} users left")
+        resume = input("Resume it (no re-crawl) [Y/n]: ").strip().lower() != "n"
+    
     print("\n⚙️  Configuration")
     print("-" * 60)
-    delay = input("Delay between unfollows (seconds) [3]: ").strip()
-    delay = int(delay) if delay else 3
+    delay = input("Delay between unfollows (seconds) [3]: ").strip() or "3"
+    argv = ["unfollow", "--username", username, "--delay", delay]
+    if resume:
+        argv.append("--resume")
+    else:
+        max_age = input("Reuse saved lists up to N minutes old [0 = always re-crawl]: ").strip()
+        argv += ["--max-age", max_age or "0"]
+    if input("Lean browser (headless, no images/fonts/trackers) [Y/n]: ").strip().lower() == "n":
+        argv.append("--no-lean")
+    if not resume:
+        max_unfollows = input("Max users to unfollow [all]: ").strip()
+        if max_unfollows:
+            argv += ["--max", max_unfollows]
+    if input("Visit each profile instead of unfollowing from your list pages [y/N]: ").strip().lower() == "y":
+        argv.append("--profile-mode")
     
     print("\n⏳ Starting unfollow process...")
     print("-" * 60)
     
     try:
-        from unfollow import LetterboxdUnfollower
-        unfollower = LetterboxdUnfollower(username, password)
-        unfollower.run(delay_between_unfollows=delay)
-    except ImportError:
-        print("\n❌ Error: Could not import unfollow tool.")
-        print("Make sure 'unfollow.py' exists in the 'tools' folder.")
+        run_cli(argv, manager=manager, password=password, interactive=True)
+    except ImportError as e:
+        print(f"\n❌ Error: Could not import unfollow tool ({e}).")
         input("\nPress Enter to continue...")
     except Exception as e:
         print(f"\n❌ Error: {e}")
         input("\nPress Enter to continue...")
 
-def follow_bot():
+def follow_bot(manager=None):
     """Run the follow bot tool"""
     clear_screen()
     print_header()
@@ -77,26 +111,35 @@ def follow_bot():
     print("\n⚙️  Configuration")
     print("-" * 60)
     target = input("Target user to copy following from: ").strip()
-    max_follows = input("Max users to follow [50]: ").strip()
-    max_follows = int(max_follows) if max_follows else 50
-    delay = input("Delay between follows (seconds) [2]: ").strip()
-    delay = int(delay) if delay else 2
+    max_follows = input("Max users to follow [50]: ").strip() or "50"
+    delay = input("Delay between follows (seconds) [2]: ").strip() or "2"
+    argv = ["follow", target, "--username", username, "--max", max_follows, "--delay", delay]
+    if input("Lean browser (headless, no images/fonts/trackers) [Y/n]: ").strip().lower() == "n":
+        argv.append("--no-lean")
     
     print("\n⏳ Starting follow bot...")
     print("-" * 60)
     
     try:
-        from follow_bot import LetterboxdFollowBot
-        bot = LetterboxdFollowBot(username, password)
-        bot.run(target, max_follows=max_follows, delay_between_follows=delay)
-    except ImportError:
-        print("\n❌ Error: Could not import follow bot.")
-        print("Make sure 'follow_bot.py' exists in the 'tools' folder.")
+        run_cli(argv, manager=manager, password=password, interactive=True)
+    except ImportError as e:
+        print(f"\n❌ Error: Could not import follow bot ({e}).")
         input("\nPress Enter to continue...")
     except Exception as e:
         print(f"\n❌ Error: {e}")
         input("\nPress Enter to continue...")
 
+def ask_ranking():
+    """CLI options for listing non-mutuals by the counts on their list rows"""
+    rank = input("Rank non-mutuals by (watched/lists/likes/followers/following) [skip]: ").strip().lower()
+    max_watched = input("Only non-mutuals who watched at most N films [skip]: ").strip()
+    argv = []
+    if rank:
+        argv += ["--rank", rank]
+    if max_watched:
+        argv += ["--max-watched", max_watched]
+    return argv
+
 def check_stats():
     """Check account statistics"""
     clear_screen()
@@ -104,47 +147,72 @@ def check_stats():
     print("\n📊 ACCOUNT STATISTICS")
     print("="*60)
     
-    username, password = get_credentials()
+    # Follower/following lists are public, so no login or browser is needed
+    usernames = input("\nLetterboxd Username(s), separated by spaces: ").replace(",", " ").split()
+    max_age = input("Reuse saved lists up to N minutes old [60]: ").strip() or "60"
+    argv = ["stats", *usernames, "--max-age", max_age] + ask_ranking()
     
     print("\n⏳ Fetching statistics...")
     print("-" * 60)
     
     try:
-        from unfollow import LetterboxdUnfollower
-        checker = LetterboxdUnfollower(username, password)
-        checker.setup_driver()
-        
-        if not checker.login():
-            print("❌ Login failed!")
-            input("\nPress Enter to continue...")
-            return
-        
-        print("\n📈 Gathering data...")
-        following = checker.get_following()
-        followers = checker.get_followers()
-        
-        mutuals = following & followers
-        non_mutuals = following - followers
-        
-        print("\n" + "="*60)
-        print("ACCOUNT STATISTICS")
-        print("="*60)
-        print(f"👥 Following: {len(following)}")
-        print(f"👤 Followers: {len(followers)}")
-        print(f"🤝 Mutuals: {len(mutuals)}")
-        print(f"🚫 Non-Mutuals: {len(non_mutuals)}")
-        print(f"📊 Follow Ratio: {len(following)/len(followers):.2f}" if followers else "📊 Follow Ratio: N/A")
-        print("="*60)
-        
-        checker.driver.quit()
-        input("\nPress Enter to continue...")
-        
+        run_cli(argv)
     except ImportError:
         print("\n❌ Error: Could not import required tools.")
-        input("\nPress Enter to continue...")
     except Exception as e:
         print(f"\n❌ Error: {e}")
-        input("\nPress Enter to continue...")
+    input("\nPress Enter to continue...")
+
+def offline_stats():
+    """Statistics from saved snapshots - no login, browser or crawl"""
+    clear_screen()
+    print_header()
+    print("\n📈 OFFLINE STATISTICS")
+    print("="*60)
+    
+    username = input("\nLetterboxd Username: ").strip()
+    since = input("Show who unfollowed you since (YYYY-MM-DD or e.g. 7d) [skip]: ").strip()
+    history = input("Show list changes over time [y/N]: ").strip().lower() == "y"
+    export = input("Export non-mutuals to file (.csv or .json) [skip]: ").strip()
+    
+    argv = ["stats", username, "--offline"] + ask_ranking()
+    if since:
+        argv += ["--since", since]
+    if history:
+        argv.append("--history")
+    if export:
+        argv += ["--export", export]
+    
+    try:
+        run_cli(argv)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+    input("\nPress Enter to continue...")
+
+def audience_overlap():
+    """Shared and exclusive followers of two or more accounts - public lists, no login"""
+    clear_screen()
+    print_header()
+    print("\n🔀 AUDIENCE OVERLAP")
+    print("="*60)
+    
+    usernames = input("\nLetterboxd Usernames to compare, separated by spaces: ").replace(",", " ").split()
+    kind = input("Compare followers or following [followers]: ").strip().lower() or "followers"
+    max_age = input("Reuse saved lists up to N minutes old [60]: ").strip() or "60"
+    export = input("Export the shared/exclusive users to file (.csv or .json) [skip]: ").strip()
+    
+    argv = ["overlap", *usernames, "--list", kind, "--max-age", max_age]
+    if export:
+        argv += ["--export", export]
+    
+    print("\n⏳ Loading lists...")
+    print("-" * 60)
+    
+    try:
+        run_cli(argv)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+    input("\nPress Enter to continue...")
 
 def settings():
     """Settings menu"""
@@ -155,8 +223,19 @@ def settings():
     print("\n⚠️  Default Settings:")
     print("-" * 60)
     print("• Unfollow Delay: 3 seconds")
+    print("• Unfollow Mode: from your following list pages (profiles only as a fallback)")
     print("• Follow Delay: 2 seconds")
     print("• Max Follows: 50 users")
+    print("• Page Wait Timeout: 10 seconds")
+    print("• Minimum Page Delay: 0.5 seconds (pages load as soon as they're ready)")
+    print("• List Crawling: 4 pages at a time, max 2 requests/second overall")
+    print("• Throttling: backs off automatically on rate-limit responses or repeated failures")
+    print("• Browser Restarts: every 400 page loads, above 1500 MB, when pages slow to 3x or the session dies")
+    try:
+        from ratelimit import limiter
+        print(f"• Effective Rate Now: {limiter.describe()}")
+    except ImportError:
+        pass
     print("-" * 60)
     print("\n💡 Tip: You can adjust these values when running each tool.")
     print("\n⚠️  Rate Limiting:")
@@ -164,24 +243,28 @@ def settings():
     print("="*60)
     input("\nPress Enter to continue...")
 
-def main():
+def main(manager=None):
     """Main program loop"""
     while True:
         clear_screen()
         print_header()
         print_menu()
         
-        choice = input("\nSelect an option (1-5): ").strip()
+        choice = input("\nSelect an option (1-7): ").strip()
         
         if choice == "1":
-            unfollow_tool()
+            unfollow_tool(manager)
         elif choice == "2":
-            follow_bot()
+            follow_bot(manager)
         elif choice == "3":
             check_stats()
         elif choice == "4":
-            settings()
+            offline_stats()
         elif choice == "5":
+            audience_overlap()
+        elif choice == "6":
+            settings()
+        elif choice == "7":
             clear_screen()
             print("\n👋 Thanks for using Letterboxd AIO!")
             print("="*60)
@@ -191,10 +274,24 @@ def main():
             input("\nPress Enter to continue...")
 
 if __name__ == "__main__":
+    # With arguments this is the non-interactive CLI, e.g. `AIO start.py stats someone`
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    
+    # One warm browser is shared by every menu action and closed on exit
+    try:
+        from driver import DriverManager
+        manager = DriverManager()
+    except ImportError:
+        manager = None
+    
     try:
-        main()
+        main(manager)
     except KeyboardInterrupt:
         clear_screen()
         print("\n\n👋 Interrupted by user. Goodbye!")
         print("="*60)
         sys.exit(0)
+    finally:
+        if manager:
+            manager.shutdown()
@@ -0,0 +1,285 @@
+"""Local stand-in for the Letterboxd pages the tools read
+
+Serves synthetic profile, following/followers and sign-in pages using the
+same markup the tools select on, with configurable list sizes and latency:
+
+    python bench/fixture_server.py --following 5000 --followers 8000 --latency 0.05
+
+then point a tool at it with site_url="http://127.0.0.1:8000".
+"""
+import argparse
+import re
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+ACCOUNT = "benchuser"
+PAGE_SIZE = 25
+SESSION_COOKIE = "letterboxd.signed.in.as"
+
+LIST_PATH = re.compile(r"^/([^/]+)/(following|followers)/(?:page/(\d+)/)?$")
+PROFILE_PATH = re.compile(r"^/([^/]+)/$")
+
+FOLLOW_SCRIPT = """
+<script>
+document.addEventListener('click', function (event) {
+    var button = event.target.closest('.js-button-follow, .js-button-following');
+    if (!button) { return; }
+    event.preventDefault();
+    var wrapper = button.parentNode;
+    var following = button.classList.contains('js-button-follow');
+    wrapper.querySelector('.js-button-follow').style.display = following ? 'none' : '';
+    wrapper.querySelector('.js-button-following').style.display = following ? '' : 'none';
+});
+</script>
+"""
+
+
+class FixtureSite:
+    """Synthetic social graph for one account, generated on the fly by index
+
+    following[i] is member{i}; followers are member{offset + i}, with
+    offset = following * (1 - overlap), so the last `overlap` fraction of
+    the following list are mutuals. Nothing is stored,
+    which keeps 100k-user lists cheap.
+    """
+
+    def __init__(self, account=ACCOUNT, following=500, followers=500, overlap=0.6,
+                 page_size=PAGE_SIZE, latency=0.0):
+        self.account = account
+        self.following = following
+        self.followers = followers
+        self.page_size = page_size
+        self.latency = latency
+        self.follower_offset = int(following * (1 - overlap))
+
+    def members(self, kind):
+        if kind == "following":
+            return 0, self.following
+        return self.follower_offset, self.followers
+
+    def is_following(self, username):
+        match = re.fullmatch(r"member(\d+)", username)
+        return bool(match) and int(match.group(1)) < self.following
+
+    def page_count(self, kind):
+        size = self.members(kind)[1]
+        return max(1, -(-size // self.page_size))
+
+    def render_row(self, index, username):
+        name = f"Member {index}"
+        follow_style = ' style="display:none"' if self.is_following(username) else ""
+        following_style = "" if self.is_following(username) else ' style="display:none"'
+        return f"""
+<tr>
+  <td class="table-person">
+    <div class="person-summary">
+      <a class="avatar -a40" href="/{username}/"><img src="/static/avatar.png" alt="{name}" width="40" height="40"></a>
+      <h3 class="title-3"><a href="/{username}/" class="name">{name}</a></h3>
+      <small class="metadata"><a href="/{username}/followers/">{index % 900} followers</a>, <a href="/{username}/following/">following {index % 700}</a></small>
+    </div>
+  </td>
+  <td class="col-watched"><a href="/{username}/films/" class="has-icon icon-watched icon-16"><span class="icon"></span>{(index * 37) % 5000:,}</a></td>
+  <td class="col-lists"><a href="/{username}/lists/" class="has-icon icon-list icon-16"><span class="icon"></span>{index % 40}</a></td>
+  <td class="col-likes"><a href="/{username}/likes/films/" class="has-icon icon-like icon-16"><span class="icon"></span>{(index * 13) % 900}</a></td>
+  <td class="col-follow">
+    <span class="follow-button-wrapper js-follow-button-wrapper" data-username="{username}">
+      <a href="#" class="button -small js-button-follow"{follow_style}>Follow</a>
+      <a href="#" class="button -small js-button-following"{following_style}>Following</a>
+    </span>
+  </td>
+</tr>"""
+
+    def render_pagination(self, account, kind, page):
+        last = self.page_count(kind)
+        if last == 1:
+            return ""
+
+        base = f"/{account}/{kind}/"
+
+        def link(n):
+            return base if n == 1 else f"{base}page/{n}/"
+
+        shown = sorted({1, 2, page - 1, page, page + 1, last - 1, last} & set(range(1, last + 1)))
+
+        items = []
+        for n in shown:
+            if n == page:
+                items.append(f'<li class="paginate-page paginate-current"><span>{n}</span></li>')
+            else:
+                items.append(f'<li class="paginate-page"><a href="{link(n)}">{n}</a></li>')
+
+        nextprev = ""
+        if page > 1:
+            nextprev += f'<a class="previous" href="{link(page - 1)}">Newer</a>'
+        if page < last:
+            nextprev += f'<a class="next" href="{link(page + 1)}">Older</a>'
+
+        return f"""
+<div class="pagination">
+  <div class="paginate-nextprev">{nextprev}</div>
+  <div class="paginate-pages"><ul>{''.join(items)}</ul></div>
+</div>"""
+
+    def render_list(self, account, kind, page):
+        start, size = self.members(kind)
+        first = (page - 1) * self.page_size
+        indexes = range(start + first, start + min(first + self.page_size, size))
+        rows = "".join(self.render_row(i, f"member{i}") for i in indexes)
+
+        return self.render_page(f"{account} - {kind}", f"""
+<section class="col-main">
+  <h1 class="title-hero">{escape(kind.title())}</h1>
+  <table class="person-table">
+    <thead><tr><th>Name</th><th>Watched</th><th>Lists</th><th>Likes</th><th></th></tr></thead>
+    <tbody>{rows}</tbody>
+  </table>
+  {self.render_pagination(account, kind, page)}
+</section>""")
+
+    def render_profile(self, username):
+        if username == self.account:
+            following, followers = self.following, self.followers
+        else:
+            following, followers = 0, 0
+        follow_style = ' style="display:none"' if self.is_following(username) else ""
+        following_style = "" if self.is_following(username) else ' style="display:none"'
+
+        return self.render_page(username, f"""
+<section class="profile-header">
+  <h1 class="title-1">{escape(username)}</h1>
+  <span class="follow-button-wrapper js-follow-button-wrapper" data-username="{username}">
+    <a href="#" class="button js-button-follow"{follow_style}>Follow</a>
+    <a href="#" class="button js-button-following"{following_style}>Following</a>
+  </span>
+  <div class="profile-stats">
+    <h4 class="profile-statistic"><a href="/{username}/following/"><span class="value">{following:,}</span><span class="definition">Following</span></a></h4>
+    <h4 class="profile-statistic"><a href="/{username}/followers/"><span class="value">{followers:,}</span><span class="definition">Followers</span></a></h4>
+  </div>
+</section>""")
+
+    def render_sign_in(self):
+        return self.render_page("Sign in", """
+<form action="/sign-in/" method="post">
+  <input type="text" id="field-username" name="username">
+  <input type="password" id="field-password" name="password">
+  <button type="submit" class="button -action">Sign in</button>
+</form>""")
+
+    def render_page(self, title, body):
+        return f"""<!DOCTYPE html>
+<html>
+<head><title>{escape(title)} • Letterboxd fixture</title></head>
+<body>
+<header><a class="avatar" href="/{self.account}/">{self.account}</a></header>
+{body}
+{FOLLOW_SCRIPT}
+</body>
+</html>"""
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    site = None
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one write; otherwise Nagle + delayed ACK adds
+    # ~40ms to every keep-alive response and swamps what we're measuring
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_html(self, html, status=200, headers=()):
+        body = html.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def redirect(self, location, headers=()):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+
+    def signed_in(self):
+        return SESSION_COOKIE in (self.headers.get("Cookie") or "")
+
+    def do_GET(self):
+        site = self.site
+        if site.latency:
+            time.sleep(site.latency)
+
+        path = self.path.split("?")[0]
+        if path.startswith("/static/"):
+            return self.send_html("", status=204)
+        if path == "/":
+            return self.send_html(site.render_page("Home", "<h1>Home</h1>"))
+        if path == "/sign-in/":
+            return self.send_html(site.render_sign_in())
+        if path == "/settings/":
+            if self.signed_in():
+                return self.send_html(site.render_page("Settings", "<h1>Settings</h1>"))
+            return self.redirect("/sign-in/")
+
+        match = LIST_PATH.match(path)
+        if match:
+            account, kind, page = match.group(1), match.group(2), int(match.group(3) or 1)
+            if page > site.page_count(kind):
+                return self.send_html(site.render_page(kind, "<p>No members</p>"))
+            return self.send_html(site.render_list(account, kind, page))
+
+        match = PROFILE_PATH.match(path)
+        if match:
+            return self.send_html(site.render_profile(match.group(1)))
+
+        self.send_html(site.render_page("Not found", "<h1>Not found</h1>"), status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        if self.path.startswith("/sign-in/") and form.get("username"):
+            cookie = f"{SESSION_COOKIE}={form['username'][0]}; Path=/"
+            return self.redirect(f"/{form['username'][0]}/", headers=[("Set-Cookie", cookie)])
+        self.redirect("/sign-in/")
+
+
+def start_server(site, host="127.0.0.1", port=0):
+    """Serve site in a background thread, returns (server, base url)"""
+    handler = type("Handler", (FixtureHandler,), {"site": site})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local Letterboxd stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--account", default=ACCOUNT)
+    parser.add_argument("--following", type=int, default=500)
+    parser.add_argument("--followers", type=int, default=500)
+    parser.add_argument("--overlap", type=float, default=0.6, help="fraction of following that are mutuals")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    site = FixtureSite(args.account, args.following, args.followers, args.overlap, latency=args.latency)
+    server, url = start_server(site, args.host, args.port)
+    print(f"Serving @{args.account} at {url} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Crawl/parse benchmarks against the local fixture server
+
+    python bench/run_bench.py --sizes 100,1000,10000 --latency 0.02
+
+Reports, per backend and list size: pages/sec, parse time per page,
+end-to-end crawl time and peak memory. The selenium backend is included
+when selenium and a Chrome driver are available (skip it with --http-only).
+
+To measure against real markup instead, record a crawl once and replay it:
+
+    python tools/cli.py --record crawl.zip stats youraccount
+    python bench/run_bench.py --replay crawl.zip --account youraccount
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+
+from fixture_server import ACCOUNT, FixtureSite, start_server  # noqa: E402
+
+from archive import PageArchive  # noqa: E402
+from backends import HttpBackend, ReplayBackend  # noqa: E402
+from extractor import parse_list_page  # noqa: E402
+from snapshots import SnapshotStore  # noqa: E402
+
+
+def peak_rss_mb():
+    """Peak RSS of this process so far, in MB"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def time_parse(site_url, backend, repeat=20, account=ACCOUNT, kind="following"):
+    """Average seconds to parse one full list page"""
+    html = backend.fetch(f"{site_url}/{account}/{kind}/")
+    started = time.perf_counter()
+    for _ in range(repeat):
+        parse_list_page(html)
+    return (time.perf_counter() - started) / repeat
+
+
+def crawl(make_backend, site_url, concurrency, trace_memory=False, account=ACCOUNT, kind="following"):
+    """Crawl the following list end to end, returns (seconds, pages, users, peak heap MB)
+
+    Heap tracing slows Python down a lot, so timings and peak memory come
+    from separate runs.
+    """
+    from unfollow import LetterboxdUnfollower
+
+    backend = make_backend()
+    unfollower = LetterboxdUnfollower(
+        account, None, backend=backend, store=SnapshotStore(":memory:"),
+        concurrency=concurrency, site_url=site_url,
+    )
+    pages = []
+    original_load_page = backend.load_page
+
+    def counting_load_page(url):
+        pages.append(url)
+        return original_load_page(url)
+
+    backend.load_page = counting_load_page
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    # The tools print a line per page; keep the benchmark output to the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        users, _, _ = unfollower.crawl_pages(f"{site_url}/{account}/{kind}/")
+    elapsed = time.perf_counter() - started
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    backend.close()
+    unfollower.store.close()
+    return elapsed, len(pages), len(users), peak
+
+
+def selenium_backend_factory(lean=True):
+    """Factory for a SeleniumBackend on a fresh lean Chrome, or None if unavailable"""
+    try:
+        from backends import SeleniumBackend
+        from driver import create_driver
+        driver = create_driver(lean=lean)
+    except Exception as e:
+        print(f"Skipping selenium backend: {str(e).splitlines()[0][:80]}")
+        return None, None
+
+    def make_backend():
+        return SeleniumBackend(driver)
+
+    return make_backend, driver
+
+
+def run(sizes, latency, concurrency, http_only):
+    results = []
+    selenium_factory, selenium_driver = (None, None) if http_only else selenium_backend_factory()
+
+    for size in sizes:
+        site = FixtureSite(following=size, followers=size, latency=latency)
+        server, site_url = start_server(site)
+
+        backends = [
+            ("http", lambda: HttpBackend(rate=0), 1),
+            (f"http x{concurrency}", lambda: HttpBackend(rate=0), concurrency),
+        ]
+        if selenium_factory:
+            backends.append(("selenium (lean)", selenium_factory, 1))
+
+        for name, make_backend, workers in backends:
+            # A 100k list through the browser takes hours; keep selenium to small sizes
+            if name.startswith("selenium") and size > 10000:
+                continue
+
+            parse_time = time_parse(site_url, HttpBackend(rate=0))
+            elapsed, pages, users, _ = crawl(make_backend, site_url, workers)
+            peak_mb = crawl(make_backend, site_url, workers, trace_memory=True)[3]
+            results.append({
+                "backend": name,
+                "list_size": size,
+                "pages": pages,
+                "users": users,
+                "crawl_seconds": round(elapsed, 3),
+                "pages_per_second": round(pages / elapsed, 1) if elapsed else None,
+                "parse_ms_per_page": round(parse_time * 1000, 2),
+                "peak_heap_mb": round(peak_mb, 1),
+                "peak_rss_mb": round(peak_rss_mb() or 0, 1),
+            })
+            print_result(results[-1])
+
+        server.shutdown()
+
+    if selenium_driver:
+        selenium_driver.quit()
+    return results
+
+
+def run_replay(path, account, concurrency):
+    """Crawl an account's recorded lists from an archive, at parsing speed"""
+    archive = PageArchive(path)
+    results = []
+    for kind in ("following", "followers"):
+        parse_time = time_parse("", ReplayBackend(archive), account=account, kind=kind)
+        for workers in (1, concurrency):
+            def make_backend():
+                return ReplayBackend(archive)
+            elapsed, pages, users, _ = crawl(make_backend, "", workers, account=account, kind=kind)
+            peak_mb = crawl(make_backend, "", workers, trace_memory=True, account=account, kind=kind)[3]
+            results.append({
+                "backend": f"replay {kind[:9]} x{workers}",
+                "list_size": users,
+                "pages": pages,
+                "users": users,
+                "crawl_seconds": round(elapsed, 3),
+                "pages_per_second": round(pages / elapsed, 1) if elapsed else None,
+                "parse_ms_per_page": round(parse_time * 1000, 2),
+                "peak_heap_mb": round(peak_mb, 1),
+                "peak_rss_mb": round(peak_rss_mb() or 0, 1),
+            })
+            print_result(results[-1])
+    archive.close()
+    return results
+
+
+def print_result(result):
+    print(
+        f"{result['backend']:<16} {result['list_size']:>7,} users  "
+        f"{result['pages']:>5} pages  {result['crawl_seconds']:>8.2f}s  "
+        f"{result['pages_per_second']:>7} pages/s  "
+        f"parse {result['parse_ms_per_page']:>6.2f} ms/page  "
+        f"heap {result['peak_heap_mb']:>6.1f} MB  rss {result['peak_rss_mb']:>6.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list crawling against the fixture server")
+    parser.add_argument("--sizes", default="100,1000,10000,100000",
+                        help="comma separated list sizes (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--http-only", action="store_true", help="skip the selenium backend")
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--replay", metavar="ARCHIVE", help="crawl pages recorded with cli.py --record instead")
+    parser.add_argument("--account", help="with --replay: the account whose lists were recorded")
+    args = parser.parse_args()
+
+    if args.replay:
+        if not args.account:
+            parser.error("--replay needs --account")
+        results = run_replay(args.replay, args.account.lower(), args.concurrency)
+    else:
+        sizes = [int(size) for size in args.sizes.split(",")]
+        results = run(sizes, args.latency, args.concurrency, args.http_only)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
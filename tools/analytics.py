@@ -0,0 +1,355 @@
+"""Offline statistics from saved follower/following snapshots
+
+    python tools/analytics.py <username>
+    python tools/analytics.py <username> --since 2026-01-01 --export non_mutuals.csv
+    python tools/analytics.py <username> --rank watched --max-watched 10
+
+Everything comes from the snapshot database, so there's no login, browser
+or crawl, and selenium is never imported.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from crawler import PAGE_SIZE  # noqa: E402
+from events import EVENT_LABELS, EventLog  # noqa: E402
+from extractor import RECORD_FIELDS, ROW_COUNTS  # noqa: E402
+from snapshots import SnapshotStore, format_age  # noqa: E402
+from usertable import UserTable, popcount  # noqa: E402
+
+RELATIVE_DATE = re.compile(r"^(\d+)([mhdw])$")
+UNIT_SECONDS = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_since(value):
+    """Timestamp for '2026-01-31', '2026-01-31 18:00' or a relative '7d'/'12h'"""
+    value = value.strip()
+    match = RELATIVE_DATE.match(value)
+    if match:
+        return time.time() - int(match.group(1)) * UNIT_SECONDS[match.group(2)]
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Can't read date '{value}' - use YYYY-MM-DD, 'YYYY-MM-DD HH:MM' or e.g. 7d")
+
+
+def format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
+
+
+class AccountAnalytics:
+    """Statistics for one account computed from its stored snapshots"""
+
+    def __init__(self, store, account):
+        self.store = store
+        self.account = account.lower()
+        # A crawl that came out short of the profile count would make
+        # everyone it missed look like a non-mutual, so only verified ones count
+        self.following = store.latest(self.account, "following", verified_only=True)
+        self.followers = store.latest(self.account, "followers", verified_only=True)
+        # Every snapshot compared here is loaded once, as a bitmap over one table
+        self.users = UserTable()
+        self._bitmaps = {}
+
+    @property
+    def available(self):
+        return self.following is not None and self.followers is not None
+
+    def stats(self):
+        """The five headline numbers, plus when each list was crawled"""
+        mutuals = self.store.overlap_count(self.following.id, self.followers.id)
+        return {
+            "account": self.account,
+            "following": self.following.size,
+            "followers": self.followers.size,
+            "mutuals": mutuals,
+            "non_mutuals": self.following.size - mutuals,
+            "ratio": round(self.following.size / self.followers.size, 2) if self.followers.size else None,
+            "following_crawled_at": self.following.crawled_at,
+            "followers_crawled_at": self.followers.crawled_at,
+        }
+
+    def bitmap(self, snapshot):
+        """A snapshot's members as a bitmap over self.users (cached)"""
+        if snapshot.id not in self._bitmaps:
+            self._bitmaps[snapshot.id] = self.users.bitmap(self.store.load_list(snapshot.id))
+        return self._bitmaps[snapshot.id]
+
+    def non_mutuals(self):
+        """Users you follow who don't follow back, in following-list order"""
+        return self.store.difference(self.following.id, self.followers.id)
+
+    def non_mutual_rows(self, rank=None, max_watched=None):
+        """Non-mutuals as report rows with their list-row counts, optionally filtered and ranked"""
+        # Position and page are where each user sits in the following list,
+        # not in this filtered one, so the page can be opened to find them
+        positions = dict(self.store.positioned_difference(self.following.id, self.followers.id))
+        return rank_rows(user_rows(positions, self.store.records(positions), positions), rank, max_watched)
+
+    def changes(self, kind):
+        """One row per stored snapshot of a list: size and change since the previous one
+
+        Short (unverified) crawls are listed with verified False and no
+        changes, and the next crawl is compared with the last verified one,
+        so a short crawl doesn't show up as a burst of removed and re-added users.
+        """
+        rows = []
+        previous = None
+        for snapshot in self.store.history(self.account, kind):
+            row = {"crawled_at": snapshot.crawled_at, "size": snapshot.size, "added": None, "removed": None,
+                   "verified": snapshot.verified}
+            if not snapshot.verified:
+                rows.append(row)
+                continue
+            current = self.bitmap(snapshot)
+            if previous is not None:
+                row["added"] = popcount(current & ~previous)
+                row["removed"] = popcount(previous & ~current)
+            rows.append(row)
+            previous = current
+        return rows
+
+    def unfollowed_since(self, since):
+        """Followers in the snapshot closest to `since` who are gone from the latest one
+
+        Returns (baseline snapshot, usernames).
+        """
+        baseline = self.store.at(self.account, "followers", since, verified_only=True)
+        if baseline is None or baseline.id == self.followers.id:
+            return baseline, []
+        return baseline, self.store.difference(baseline.id, self.followers.id)
+
+
+def list_stats(account, following, followers):
+    """The headline numbers for in-memory following/followers sets"""
+    mutuals = len(following & followers)
+    return {
+        "account": account.lower(),
+        "following": len(following),
+        "followers": len(followers),
+        "mutuals": mutuals,
+        "non_mutuals": len(following) - mutuals,
+        "ratio": round(len(following) / len(followers), 2) if followers else None,
+    }
+
+
+def user_rows(usernames, records=None, positions=None):
+    """Report rows for usernames in list order: position, page and, with records, the row counts
+
+    positions maps usernames to their 0-based place in the full list; without
+    it, the order of `usernames` is taken as the list order. A user with no
+    known position gets None for position and page.
+    """
+    rows = []
+    for i, username in enumerate(usernames):
+        index = i if positions is None else positions.get(username)
+        row = {
+            "username": username,
+            "position": None if index is None else index + 1,
+            "page": None if index is None else index // PAGE_SIZE + 1,
+        }
+        if records is not None:
+            record = records.get(username)
+            for field in RECORD_FIELDS[1:]:
+                row[field] = getattr(record, field) if record else None
+        rows.append(row)
+    return rows
+
+
+def rank_rows(rows, rank=None, max_watched=None):
+    """Keep users who watched at most max_watched films, then sort by a count, lowest first
+
+    Users whose count isn't known sort last and are dropped by the filter.
+    """
+    if max_watched is not None:
+        rows = [row for row in rows if row.get("watched") is not None and row["watched"] <= max_watched]
+    if rank:
+        rows = sorted(rows, key=lambda row: (row.get(rank) is None, row.get(rank) or 0))
+    return rows
+
+
+def export_rows(rows, path):
+    """Write report rows to .json or .csv (by extension)"""
+    if path.lower().endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["username", "position", "page"])
+            writer.writeheader()
+            writer.writerows(rows)
+    return len(rows)
+
+
+def export_users(usernames, path, records=None):
+    """Write usernames to .json or .csv (by extension), with list position, page and any row counts"""
+    return export_rows(user_rows(usernames, records), path)
+
+
+def print_stats(stats, source="saved lists"):
+    print("\n" + "="*60)
+    print(f"ACCOUNT STATISTICS - @{stats['account']} ({source})")
+    print("="*60)
+    print(f"👥 Following: {stats['following']}")
+    print(f"👤 Followers: {stats['followers']}")
+    print(f"🤝 Mutuals: {stats['mutuals']}")
+    print(f"🚫 Non-Mutuals: {stats['non_mutuals']}")
+    print(f"📊 Follow Ratio: {stats['ratio']:.2f}" if stats["ratio"] is not None else "📊 Follow Ratio: N/A")
+    if "following_crawled_at" in stats:
+        print("-"*60)
+        print(f"Following crawled {format_age(time.time() - stats['following_crawled_at'])} ago, "
+              f"followers {format_age(time.time() - stats['followers_crawled_at'])} ago")
+    print("="*60)
+
+
+def print_ranked(rows, rank=None, top=10, total=None):
+    """Table of the first `top` report rows with their counts
+
+    total is the full number of rows when `rows` was already cut down.
+    """
+    total = len(rows) if total is None else total
+    title = f"by {rank}, lowest first" if rank else "in list order"
+    print(f"\nNon-mutuals {title} ({total} total)")
+    print("-"*60)
+    print(f"{'username':<24}{'watched':>8}{'lists':>7}{'likes':>7}{'followers':>11}")
+    for row in rows[:top]:
+        counts = ["-" if row.get(field) is None else row[field] for field in ("watched", "lists", "likes", "followers")]
+        print(f"{row['username'][:23]:<24}{counts[0]:>8}{counts[1]:>7}{counts[2]:>7}{counts[3]:>11}")
+    if total > min(top, len(rows)):
+        print(f"... and {total - min(top, len(rows))} more")
+
+
+def print_events(events):
+    for event in events:
+        marker = " (last known)" if event.compacted else ""
+        print(f"{format_time(event.at):<18}@{event.username:<24}{EVENT_LABELS[event.type]}{marker}")
+
+
+def print_event_counts(counts):
+    print(", ".join(f"{counts.get(event_type, 0)} {label}" for event_type, label in EVENT_LABELS.items()))
+
+
+def print_monthly(totals):
+    print(f"{'month':<10}" + "".join(f"{label:>16}" for label in EVENT_LABELS.values()))
+    for month, counts in totals.items():
+        print(f"{month:<10}" + "".join(f"{counts.get(event_type, 0):>16}" for event_type in EVENT_LABELS))
+
+
+def print_changes(kind, rows):
+    print(f"\n{kind.title()} over time")
+    print("-"*60)
+    print(f"{'crawled':<18}{'size':>8}{'added':>8}{'removed':>9}")
+    for row in rows:
+        added = "" if row["added"] is None else f"+{row['added']}"
+        removed = "" if row["removed"] is None else f"-{row['removed']}"
+        short = "" if row.get("verified", True) else "  (short crawl, not compared)"
+        print(f"{format_time(row['crawled_at']):<18}{row['size']:>8}{added:>8}{removed:>9}{short}")
+
+
+def report(account, since=None, history=False, export=None, as_json=False, store=None,
+           rank=None, max_watched=None, top=10, events=None):
+    """Print (or return as JSON-ready dict) the offline report for an account
+
+    With rank or max_watched the non-mutuals are listed (and exported)
+    ranked by that count and/or filtered to inactive accounts, using the
+    row metadata saved during list crawls.
+
+    Returns None if the account has no saved following and followers lists.
+    """
+    started = time.perf_counter()
+    owns_store = store is None
+    store = store or SnapshotStore()
+    owns_events = events is None
+    events = events or EventLog(store.path)
+    try:
+        analytics = AccountAnalytics(store, account)
+        if not analytics.available:
+            if not as_json:
+                print(f"\nNo saved following and followers lists for @{account.lower()} yet.")
+                print("Run Account Statistics or the unfollow tool once to crawl them.")
+            return None
+
+        result = {"stats": analytics.stats()}
+        if history:
+            result["history"] = {kind: analytics.changes(kind) for kind in ("following", "followers")}
+        if since is not None:
+            baseline, gone = analytics.unfollowed_since(since)
+            result["unfollowed_since"] = {
+                "since": since,
+                "baseline_crawled_at": baseline.crawled_at if baseline else None,
+                "usernames": gone,
+            }
+            result["events_since"] = events.counts(account, since)
+        if rank or max_watched is not None:
+            ranked = analytics.non_mutual_rows(rank, max_watched)
+            result["ranked"] = {"by": rank, "max_watched": max_watched, "total": len(ranked), "users": ranked[:top]}
+        if export:
+            rows = ranked if rank or max_watched is not None else analytics.non_mutual_rows()
+            result["exported"] = {"path": export, "count": export_rows(rows, export)}
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    finally:
+        if owns_events:
+            events.close()
+        if owns_store:
+            store.close()
+
+    if as_json:
+        return result
+
+    print_stats(result["stats"])
+    for kind, rows in result.get("history", {}).items():
+        print_changes(kind, rows)
+    if "unfollowed_since" in result:
+        info = result["unfollowed_since"]
+        print(f"\nUnfollowed you since {format_time(info['since'])}: {len(info['usernames'])}")
+        if info["baseline_crawled_at"] and info["baseline_crawled_at"] > info["since"]:
+            print(f"(no snapshot that old - compared with the earliest, {format_time(info['baseline_crawled_at'])})")
+        for username in info["usernames"]:
+            print(f"  - {username}")
+        if result["events_since"]:
+            print("Event log over the same period: ", end="")
+            print_event_counts(result["events_since"])
+    if "ranked" in result:
+        info = result["ranked"]
+        print_ranked(info["users"], info["by"], top, info["total"])
+    if "exported" in result:
+        print(f"\nExported {result['exported']['count']} non-mutuals to {result['exported']['path']}")
+    print(f"\n(computed in {result['elapsed_ms']} ms)")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline statistics from saved snapshots")
+    parser.add_argument("username")
+    parser.add_argument("--since", help="list who unfollowed you since this date (YYYY-MM-DD or e.g. 7d)")
+    parser.add_argument("--history", action="store_true", help="show list sizes and changes over time")
+    parser.add_argument("--export", help="write the non-mutuals to this .csv or .json file")
+    parser.add_argument("--rank", choices=ROW_COUNTS, help="list the non-mutuals by this count, lowest first")
+    parser.add_argument("--max-watched", type=int, help="only non-mutuals who watched at most this many films")
+    parser.add_argument("--top", type=int, default=10, help="how many ranked non-mutuals to show (default: %(default)s)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        since = parse_since(args.since) if args.since else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    result = report(
+        args.username, since, args.history, args.export, as_json=args.json,
+        rank=args.rank, max_watched=args.max_watched, top=args.top,
+    )
+    if args.json:
+        print(json.dumps(result, indent=2))
+    return 0 if result else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
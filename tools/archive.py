@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+import zipfile
+from urllib.parse import urlsplit
+
+INDEX_NAME = "index.json"
+
+
+def archive_key(url):
+    """Archive key for a URL: path and query, so a replay works against any host"""
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+class PageArchive:
+    """One compressed file of fetched pages, for recording and replaying crawls
+
+    A zip with every page stored (deflated) as pages/<n>.html and an
+    index.json mapping each URL path to its member, fetch time and source.
+    Open with mode="w" to record (the index is written on close) or "r" to
+    replay. Re-fetching a URL keeps the newest copy in the index.
+    """
+
+    def __init__(self, path, mode="r"):
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._zip = zipfile.ZipFile(path, mode, compression=zipfile.ZIP_DEFLATED, compresslevel=6)
+        if mode == "r":
+            self.index = json.loads(self._zip.read(INDEX_NAME))
+        else:
+            self.index = {}
+
+    def add(self, url, html, source="http"):
+        with self._lock:
+            member = f"pages/{len(self._zip.namelist()) + 1:06d}.html"
+            self._zip.writestr(member, html)
+            self.index[archive_key(url)] = {"member": member, "fetched_at": round(time.time(), 3), "source": source}
+
+    def get(self, url):
+        """Archived HTML for url, or None if it wasn't recorded"""
+        entry = self.index.get(archive_key(url))
+        if entry is None:
+            return None
+        with self._lock:
+            return self._zip.read(entry["member"]).decode("utf-8")
+
+    def __contains__(self, url):
+        return archive_key(url) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        with self._lock:
+            if self._zip.fp is None:
+                return
+            if self.mode != "r":
+                self._zip.writestr(INDEX_NAME, json.dumps(self.index, indent=1))
+            self._zip.close()
+
+
+# Set by start_recording(); HttpBackend and PageWaiter hand every page they load to record()
+recorder = None
+
+
+def start_recording(path):
+    """Record every page fetched from now on into a new archive at path"""
+    global recorder
+    recorder = PageArchive(path, "w")
+    return recorder
+
+
+def stop_recording():
+    """Write the archive's index and stop recording, returns the number of pages"""
+    global recorder
+    if recorder is None:
+        return 0
+    count = len(recorder)
+    recorder.close()
+    recorder = None
+    return count
+
+
+def record(url, html, source="http"):
+    """Add a fetched page to the archive being recorded, if any"""
+    if recorder is not None:
+        recorder.add(url, html, source)
@@ -0,0 +1,162 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+from archive import record
+from crawler import PageLoadError
+from extractor import PAGINATION_SCRIPT, extract_records, parse_list_page, parse_profile_counts, dedupe_usernames
+from ratelimit import RateLimiter, is_throttle_response, limiter as shared_limiter, retry_after_seconds
+from tracing import tracer
+
+SITE_URL = "https://letterboxd.com"
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+
+class ListPage:
+    """Result of loading one following/followers list page
+
+    usernames is a list in page order (newest relationship first);
+    records maps each username to the UserRecord read from its row.
+    """
+
+    def __init__(self, url, usernames, has_next, last_page=None, records=None):
+        self.url = url
+        self.usernames = usernames
+        self.records = records or {}
+        self.has_next = has_next
+        # Last page number from the pagination widget, None if not shown
+        self.last_page = last_page
+        # Set by the crawler
+        self.page = None
+
+
+class HttpBackend:
+    """Loads public list pages over a pooled keep-alive HTTP session
+
+    No browser is involved, so this is only suitable for read-only pages
+    that don't need a logged-in session. It's safe to share between threads;
+    every request goes through one RateLimiter, by default the process-wide
+    one, so the total rate stays bounded and a throttling response slows
+    the whole tool down. Pass `rate` for a private limiter instead.
+    """
+
+    concurrent = True
+
+    def __init__(self, pool_size=8, timeout=15, rate=None, limiter=None, retries=3):
+        self.timeout = timeout
+        self.retries = retries
+        if limiter is None:
+            limiter = shared_limiter if rate is None else RateLimiter(rate)
+        self.limiter = limiter
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch(self, url):
+        """Fetch a page and return its HTML
+
+        Throttling responses back the limiter off and are retried up to
+        `retries` times before giving up.
+        """
+        for attempt in range(self.retries + 1):
+            with tracer.span("http.rate_limit"):
+                self.limiter.acquire()
+            with tracer.span("http.fetch") as span:
+                response = self.session.get(url, timeout=self.timeout)
+                if not is_throttle_response(response.status_code, response.text):
+                    response.raise_for_status()
+                    self.limiter.success()
+                    record(url, response.text)
+                    return response.text
+                span.fail()
+
+            if attempt == self.retries:
+                response.raise_for_status()
+                raise requests.HTTPError(f"Throttled: {url}", response=response)
+            self.limiter.throttled(
+                f"HTTP {response.status_code}",
+                retry_after=retry_after_seconds(response.headers.get("Retry-After")),
+            )
+
+    def load_page(self, url):
+        """Fetch and parse a list page"""
+        html = self.fetch(url)
+        with tracer.span("extract.parse"):
+            parsed = parse_list_page(html)
+        return ListPage(url, dedupe_usernames(parsed.hrefs), parsed.has_next, parsed.last_page, parsed.records)
+
+    def profile_counts(self, profile_url):
+        """Following/followers counts from a profile page header"""
+        return parse_profile_counts(self.fetch(profile_url))
+
+    def close(self):
+        self.session.close()
+
+
+class ReplayBackend(HttpBackend):
+    """Serves pages from a recorded PageArchive instead of the network
+
+    Nothing is rate limited or slept, so a crawl replays at parsing speed
+    against real markup - for repeatable performance and regression runs.
+    """
+
+    concurrent = True
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    def fetch(self, url):
+        with tracer.span("replay.fetch"):
+            html = self.archive.get(url)
+        if html is None:
+            raise PageLoadError(f"Not in the archive: {url}")
+        return html
+
+    def close(self):
+        # The archive is owned by whoever opened it
+        pass
+
+
+class SeleniumBackend:
+    """Loads list pages through an existing WebDriver (one page at a time)"""
+
+    concurrent = False
+
+    def __init__(self, driver, waiter=None):
+        # Imported here so the HTTP backends work without selenium installed
+        from waits import PageWaiter
+        self.driver = driver
+        self.waiter = waiter or PageWaiter(driver)
+
+    def fetch(self, url):
+        """Navigate to a page and return its rendered HTML"""
+        from waits import list_page_ready
+        self.waiter.get(url, list_page_ready)
+        return self.driver.page_source
+
+    def load_page(self, url):
+        """Navigate to and extract a list page, raising PageLoadError if it never got ready"""
+        from waits import list_page_ready, pagination_ready
+        if not self.waiter.get(url, list_page_ready):
+            raise PageLoadError(f"Timed out waiting for {url}")
+        self.waiter.wait_for(pagination_ready)
+
+        with tracer.span("extract.script"):
+            usernames, records = extract_records(self.driver)
+            has_next, last_page = self.driver.execute_script(PAGINATION_SCRIPT)
+        return ListPage(url, usernames, bool(has_next), last_page, records)
+
+    def profile_counts(self, profile_url):
+        """Following/followers counts from a profile page header"""
+        self.waiter.get(profile_url)
+        return parse_profile_counts(self.driver.page_source)
+
+    def close(self):
+        # The driver is owned by whoever created it
+        pass
@@ -0,0 +1,493 @@
+"""Command-line entry point for Letterboxd AIO
+
+    python tools/cli.py unfollow --username me --max 20 --json
+    python tools/cli.py follow jackhoward --max 50
+    python tools/cli.py stats someone another third --json
+    python tools/cli.py stats someone --offline --since 7d
+    python tools/cli.py stats someone --rank watched --max-watched 10
+    python tools/cli.py overlap me someone another --export overlap.csv
+    python tools/cli.py snapshot list
+    python tools/cli.py events me --since 7d --type lost_follower
+    python tools/cli.py --record crawl.zip stats someone
+    python tools/cli.py --replay crawl.zip stats someone
+
+The username can also come from LETTERBOXD_USERNAME and the password from
+LETTERBOXD_PASSWORD; leave the password unset to reuse a saved session.
+Nothing prompts, so commands can run from cron. With --json the result is
+printed to stdout as JSON and progress goes to stderr.
+
+Tool modules (selenium, requests) are only imported inside the commands
+that need them, so --help and the offline commands start quickly.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from events import EVENT_TYPES  # noqa: E402
+from extractor import ROW_COUNTS  # noqa: E402
+
+USERNAME_ENV = "LETTERBOXD_USERNAME"
+PASSWORD_ENV = "LETTERBOXD_PASSWORD"
+
+
+class CommandError(Exception):
+    """A command couldn't run; the message is shown to the user"""
+
+
+@contextlib.contextmanager
+def progress_output(as_json):
+    """With --json, send the tools' progress output to stderr so stdout is just the result"""
+    if as_json:
+        with contextlib.redirect_stdout(sys.stderr):
+            yield
+    else:
+        yield
+
+
+def emit(result):
+    print(json.dumps(result, indent=2))
+
+
+def account_name(args):
+    username = args.username or os.environ.get(USERNAME_ENV, "")
+    if not username.strip():
+        raise CommandError(f"No username - pass --username or set {USERNAME_ENV}")
+    return username.strip()
+
+
+def resolve_password(username, password):
+    """The password to log in with, '' to reuse a saved session"""
+    if password is None:
+        password = os.environ.get(PASSWORD_ENV, "")
+    if password:
+        return password
+
+    from session import SessionStore
+    if SessionStore().has(username):
+        return ""
+    if sys.stdin.isatty():
+        import getpass
+        return getpass.getpass("Letterboxd Password: ")
+    raise CommandError(f"No saved session for @{username} - set {PASSWORD_ENV}")
+
+
+def stream_counts(checker, live=True):
+    """Crawl both lists, updating the counts on one line as pages arrive"""
+    following, followers = set(), set()
+    mutuals = 0
+
+    for kind, list_page, counts in checker.stream_lists():
+        mine, other = (following, followers) if kind == "following" else (followers, following)
+        for user in list_page.usernames:
+            if user not in mine:
+                mine.add(user)
+                if user in other:
+                    mutuals += 1
+        if live:
+            print(
+                f"\r👥 {len(following)} following | 👤 {len(followers)} followers | "
+                f"🤝 {mutuals} mutuals | 🚫 {len(following) - mutuals} non-mutuals so far",
+                end="", flush=True,
+            )
+
+    if live:
+        print()
+    return following, followers
+
+
+def cmd_unfollow(args, manager=None, password=None, interactive=False):
+    username = account_name(args)
+    with progress_output(args.json):
+        password = resolve_password(username, password)
+        from unfollow import LetterboxdUnfollower
+        unfollower = LetterboxdUnfollower(
+            username, password, lean=not args.no_lean, manager=manager,
+            recycle_after=args.recycle_after, max_browser_mb=args.max_browser_mb,
+            # Recording needs a full crawl, not the cache or an incremental refresh
+            max_snapshot_age=0 if args.record else args.max_age * 60, incremental=not args.record,
+            unfollow_mode="profile" if args.profile_mode else "list",
+            pause_on_exit=interactive,
+        )
+        summary = unfollower.run(
+            delay_between_unfollows=args.delay, max_unfollows=args.max, resume=args.resume
+        )
+
+    if args.json:
+        emit(summary)
+    return 0 if summary is not None else 1
+
+
+def cmd_follow(args, manager=None, password=None, interactive=False):
+    username = account_name(args)
+    with progress_output(args.json):
+        password = resolve_password(username, password)
+        from follow_bot import LetterboxdFollowBot
+        bot = LetterboxdFollowBot(
+            username, password, lean=not args.no_lean, manager=manager, pause_on_exit=interactive,
+            recycle_after=args.recycle_after, max_browser_mb=args.max_browser_mb,
+        )
+        summary = bot.run(args.target, max_follows=args.max, delay_between_follows=args.delay)
+
+    if args.json:
+        emit(summary)
+    return 0 if summary is not None else 1
+
+
+def public_checker(args):
+    """PublicStats for the public-list commands, plus the archive it replays from (or None)"""
+    from public_stats import PublicStats
+    if args.record:
+        # Crawl every page, or the archive only holds what changed since the cache
+        return PublicStats(max_snapshot_age=0, incremental=False), None
+    if not args.replay:
+        return PublicStats(max_snapshot_age=args.max_age * 60), None
+
+    # Serve the recorded pages back at full speed, with a throwaway cache
+    from archive import PageArchive
+    from backends import ReplayBackend
+    from snapshots import SnapshotStore
+    replay = PageArchive(args.replay)
+    checker = PublicStats(
+        max_snapshot_age=args.max_age * 60, backend=ReplayBackend(replay), store=SnapshotStore(":memory:")
+    )
+    return checker, replay
+
+
+def cmd_stats(args, **kwargs):
+    if args.offline:
+        from analytics import parse_since, report
+        try:
+            since = parse_since(args.since) if args.since else None
+        except ValueError as e:
+            raise CommandError(str(e))
+        results = [
+            report(
+                username, since, args.history, args.export, as_json=args.json,
+                rank=args.rank, max_watched=args.max_watched, top=args.top,
+            )
+            for username in args.usernames
+        ]
+        if args.json:
+            emit(results[0] if len(results) == 1 else results)
+        return 0 if all(results) else 1
+
+    # Public lists only: no login or browser, one HTTP session and cache for every account
+    with progress_output(args.json):
+        from analytics import AccountAnalytics, print_ranked, print_stats
+        from tracing import tracer
+
+        tracer.reset()
+        checker, replay = public_checker(args)
+        live = not args.json and len(args.usernames) == 1
+
+        def load(reader):
+            if live and not (reader.can_load_quickly("following") and reader.can_load_quickly("followers")):
+                # Full crawl needed - show the numbers as they come in
+                print("\n📈 Gathering data (live)...")
+                return stream_counts(reader)
+            return reader.get_following_and_followers()
+
+        results = []
+        try:
+            for stats in checker.accounts(args.usernames, load):
+                results.append(stats)
+                ranked = None
+                if "error" not in stats and (args.rank or args.max_watched is not None):
+                    # Ranked from the row counts the crawl just saved - no profile visits
+                    ranked = AccountAnalytics(checker.store, stats["account"]).non_mutual_rows(
+                        args.rank, args.max_watched
+                    )
+                    stats["ranked"] = {"by": args.rank, "max_watched": args.max_watched,
+                                       "total": len(ranked), "users": ranked[:args.top]}
+                if args.json:
+                    continue
+                if "error" in stats:
+                    print(f"\n❌ @{stats['account']}: {stats['error']}")
+                else:
+                    print_stats(stats, source="from cache" if stats["source"] == "cache" else "live")
+                    if ranked is not None:
+                        print_ranked(ranked, args.rank, args.top)
+        finally:
+            checker.close()
+            if replay:
+                replay.close()
+        tracer.finish("stats")
+
+    if args.json:
+        emit(results[0] if len(results) == 1 else results)
+    return 1 if any("error" in stats for stats in results) else 0
+
+
+def cmd_overlap(args, **kwargs):
+    usernames = list(dict.fromkeys(username.lower() for username in args.usernames))
+    if len(usernames) < 2:
+        raise CommandError("Give at least two different usernames")
+
+    with progress_output(args.json):
+        from crawler import PageLoadError
+        from overlap import AudienceOverlap, export_overlap, print_overlap
+        from tracing import tracer
+
+        tracer.reset()
+        checker, replay = public_checker(args)
+        try:
+            lists = {}
+            for username in usernames:
+                print(f"\n📥 @{username} {args.list}...")
+                try:
+                    lists[username] = checker.load_list(username, args.list)
+                except (PageLoadError, OSError) as e:
+                    # OSError covers requests' connection and HTTP errors
+                    raise CommandError(f"Could not load @{username}'s {args.list}: {str(e)[:200]}")
+        finally:
+            checker.close()
+            if replay:
+                replay.close()
+
+        overlap = AudienceOverlap(lists, args.list)
+        pairs = overlap.pairs()
+        result = {"kind": args.list, "pairs": pairs}
+        if args.export:
+            result["exported"] = {"path": args.export, "count": export_overlap(overlap, args.export)}
+        tracer.finish("overlap")
+
+    if args.json:
+        emit(result)
+        return 0
+    print_overlap(overlap, pairs)
+    if args.export:
+        print(f"Exported {result['exported']['count']} usernames to {args.export}")
+    return 0
+
+
+def cmd_snapshot(args, **kwargs):
+    from analytics import AccountAnalytics, export_rows, format_time, print_changes
+    from snapshots import KINDS, SnapshotStore
+
+    store = SnapshotStore()
+    try:
+        if args.action == "list":
+            rows = []
+            for account in store.accounts():
+                row = {"account": account}
+                for kind in KINDS:
+                    latest = store.latest(account, kind, verified_only=True)
+                    row[kind] = latest.size if latest else None
+                    row[f"{kind}_crawled_at"] = latest.crawled_at if latest else None
+                rows.append(row)
+            if args.json:
+                emit(rows)
+                return 0
+            if not rows:
+                print("No saved snapshots yet.")
+            for row in rows:
+                crawled = max(row["following_crawled_at"] or 0, row["followers_crawled_at"] or 0)
+                print(f"@{row['account']:<24} following {row['following'] or '-':>7}  "
+                      f"followers {row['followers'] or '-':>7}  last crawl {format_time(crawled)}")
+            return 0
+
+        analytics = AccountAnalytics(store, args.username)
+        if not analytics.available:
+            raise CommandError(f"No saved following and followers lists for @{args.username.lower()}")
+
+        if args.action == "history":
+            history = {kind: analytics.changes(kind) for kind in KINDS}
+            if args.json:
+                emit(history)
+            else:
+                for kind, rows in history.items():
+                    print_changes(kind, rows)
+            return 0
+
+        # export
+        count = export_rows(analytics.non_mutual_rows(), args.path)
+        if args.json:
+            emit({"path": args.path, "count": count})
+        else:
+            print(f"Exported {count} non-mutuals to {args.path}")
+        return 0
+    finally:
+        store.close()
+
+
+def cmd_events(args, **kwargs):
+    from analytics import parse_since, print_event_counts, print_events, print_monthly
+    from events import EventLog
+
+    try:
+        since = parse_since(args.since) if args.since else None
+        compact_before = parse_since(args.compact) if args.compact else None
+    except ValueError as e:
+        raise CommandError(str(e))
+
+    log = EventLog()
+    try:
+        if compact_before is not None:
+            removed = log.compact(args.username, compact_before)
+            result = {"compacted": removed}
+            if not args.json:
+                print(f"Folded {removed} events into monthly totals")
+        elif args.monthly:
+            result = log.monthly_totals(args.username)
+            if not args.json:
+                print_monthly(result)
+        else:
+            if args.user:
+                events = [e for e in log.user_history(args.username, args.user) if not since or e.at >= since]
+            else:
+                events = log.between(args.username, since, types=[args.type] if args.type else None)
+            result = [event.as_dict() for event in events]
+            if not args.json:
+                if not events:
+                    print("No events logged for that yet.")
+                print_events(events)
+                if not args.user and not args.type and events:
+                    print("-"*60)
+                    print_event_counts(log.counts(args.username, since))
+    finally:
+        log.close()
+
+    if args.json:
+        emit(result)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="letterboxd-aio", description="Letterboxd AIO - unfollow, follow and statistics tools"
+    )
+    parser.add_argument("--record", metavar="ARCHIVE",
+                        help="save every page fetched to this .zip archive for later replay")
+    parser.add_argument("--replay", metavar="ARCHIVE",
+                        help="stats and overlap only: read pages from a recorded archive instead of the network")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    def add_account_options(command):
+        command.add_argument("--username", help=f"your Letterboxd username (default: ${USERNAME_ENV})")
+        command.add_argument("--no-lean", action="store_true",
+                             help="use a normal visible browser instead of the lean headless one")
+        command.add_argument("--recycle-after", type=int, default=400, metavar="N",
+                             help="restart the browser every N page loads, 0 to never (default: %(default)s)")
+        command.add_argument("--max-browser-mb", type=int, default=1500, metavar="MB",
+                             help="restart the browser when it uses more memory than this (default: %(default)s)")
+        command.add_argument("--json", action="store_true", help="print the result as JSON")
+
+    unfollow = commands.add_parser("unfollow", help="unfollow users who don't follow you back")
+    add_account_options(unfollow)
+    unfollow.add_argument("--delay", type=float, default=3, help="seconds between unfollows (default: %(default)s)")
+    unfollow.add_argument("--max", type=int, help="unfollow at most this many users")
+    unfollow.add_argument("--max-age", type=int, default=0,
+                          help="reuse saved lists up to this many minutes old (default: always re-crawl)")
+    unfollow.add_argument("--resume", action="store_true", help="continue the last interrupted run")
+    unfollow.add_argument("--profile-mode", action="store_true",
+                          help="visit each profile instead of unfollowing from your list pages")
+    unfollow.set_defaults(handler=cmd_unfollow)
+
+    follow = commands.add_parser("follow", help="follow users from someone else's following list")
+    add_account_options(follow)
+    follow.add_argument("target", help="user whose following list to copy")
+    follow.add_argument("--max", type=int, default=50, help="follow at most this many users (default: %(default)s)")
+    follow.add_argument("--delay", type=float, default=2, help="seconds between follows (default: %(default)s)")
+    follow.set_defaults(handler=cmd_follow)
+
+    stats = commands.add_parser(
+        "stats", help="following/followers/mutuals for any accounts, from public lists (no login)"
+    )
+    stats.add_argument("usernames", nargs="+", metavar="username")
+    stats.add_argument("--offline", action="store_true", help="use saved lists only, no crawl")
+    stats.add_argument("--max-age", type=int, default=60,
+                       help="reuse saved lists up to this many minutes old (default: %(default)s)")
+    stats.add_argument("--since", help="with --offline: who unfollowed since this date (YYYY-MM-DD or e.g. 7d)")
+    stats.add_argument("--history", action="store_true", help="with --offline: list changes over time")
+    stats.add_argument("--export", help="with --offline: write the non-mutuals to this .csv or .json file")
+    stats.add_argument("--rank", choices=ROW_COUNTS,
+                       help="list the non-mutuals by this count from their list rows, lowest first")
+    stats.add_argument("--max-watched", type=int, help="only list non-mutuals who watched at most this many films")
+    stats.add_argument("--top", type=int, default=10, help="how many ranked non-mutuals to show (default: %(default)s)")
+    stats.add_argument("--json", action="store_true", help="print the result as JSON")
+    stats.set_defaults(handler=cmd_stats)
+
+    overlap = commands.add_parser(
+        "overlap", help="shared and exclusive followers of two or more accounts, from public lists (no login)"
+    )
+    overlap.add_argument("usernames", nargs="+", metavar="username")
+    overlap.add_argument("--list", choices=("followers", "following"), default="followers",
+                         help="which list to compare (default: %(default)s)")
+    overlap.add_argument("--max-age", type=int, default=60,
+                         help="reuse saved lists up to this many minutes old (default: %(default)s)")
+    overlap.add_argument("--export", help="write each pair's shared/only_a/only_b usernames to this .csv or .json file")
+    overlap.add_argument("--json", action="store_true", help="print the result as JSON")
+    overlap.set_defaults(handler=cmd_overlap)
+
+    snapshot = commands.add_parser("snapshot", help="inspect and export saved lists")
+    snapshot_actions = snapshot.add_subparsers(dest="action", metavar="action")
+    snapshot_actions.required = True
+    snapshot_list = snapshot_actions.add_parser("list", help="accounts with saved lists")
+    snapshot_list.add_argument("--json", action="store_true", help="print the result as JSON")
+    snapshot_history = snapshot_actions.add_parser("history", help="list sizes and changes over time")
+    snapshot_history.add_argument("username")
+    snapshot_history.add_argument("--json", action="store_true", help="print the result as JSON")
+    snapshot_export = snapshot_actions.add_parser("export", help="write the non-mutuals to .csv or .json")
+    snapshot_export.add_argument("username")
+    snapshot_export.add_argument("path")
+    snapshot_export.add_argument("--json", action="store_true", help="print the result as JSON")
+    snapshot.set_defaults(handler=cmd_snapshot)
+
+    events = commands.add_parser("events", help="when people followed and unfollowed, from the event log")
+    events.add_argument("username", help="the account whose history to show")
+    events.add_argument("--since", help="only events since this date (YYYY-MM-DD or e.g. 7d)")
+    events.add_argument("--type", choices=list(EVENT_TYPES), help="only this kind of event")
+    events.add_argument("--user", help="one user's full history with the account")
+    events.add_argument("--monthly", action="store_true", help="totals per month over the whole history")
+    events.add_argument("--compact", metavar="AGE",
+                        help="fold events older than AGE (e.g. 180d) into monthly totals")
+    events.add_argument("--json", action="store_true", help="print the result as JSON")
+    events.set_defaults(handler=cmd_events)
+
+    return parser
+
+
+def main(argv=None, manager=None, password=None, interactive=False):
+    """Run one command, returns the exit code
+
+    The menu calls this with its shared DriverManager, the password it
+    prompted for, and interactive=True so the tools wait for Enter at the end.
+    """
+    try:
+        args = build_parser().parse_args(argv)
+    except SystemExit as e:
+        # --help or a usage error; return instead of exiting so the menu survives
+        return e.code
+    if args.replay and args.command not in ("stats", "overlap"):
+        print("Error: --replay only works with the stats and overlap commands", file=sys.stderr)
+        return 2
+    if args.record and args.replay:
+        print("Error: --record and --replay can't be used together", file=sys.stderr)
+        return 2
+    if args.record:
+        from archive import start_recording
+        start_recording(args.record)
+    try:
+        return args.handler(args, manager=manager, password=password, interactive=interactive)
+    except CommandError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return 130
+    finally:
+        if args.record:
+            from archive import stop_recording
+            recorded = stop_recording()
+            print(f"Recorded {recorded} pages to {args.record}", file=sys.stderr)
+            if not recorded:
+                print("Warning: nothing was fetched, so the archive can't be replayed", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from tracing import tracer
+
+# Users per following/followers page on Letterboxd
+PAGE_SIZE = 25
+
+
+class PageLoadError(Exception):
+    """A list page couldn't be loaded, as opposed to the list having ended"""
+
+
+def page_url(base_url, page):
+    return f"{base_url}page/{page}/" if page > 1 else base_url
+
+
+def load_page_with_retry(backend, base_url, page, last_page=None, retries=2, backoff=1.0):
+    """Load one list page, retrying failed loads and suspicious empty pages
+
+    We only ask for page > 1 because pagination said it exists, so an empty
+    one is retried too. After the retries an empty page is accepted as the
+    end only if it's at or past the last page known (the list can shrink
+    while we crawl); anything else raises PageLoadError rather than quietly
+    truncating the list.
+    """
+    url = page_url(base_url, page)
+    error = None
+    empty_page = None
+    for attempt in range(retries + 1):
+        if attempt:
+            tracer.count("crawl.retry")
+            time.sleep(backoff * 2 ** (attempt - 1))
+        try:
+            list_page = backend.load_page(url)
+        except Exception as e:
+            error = e
+            empty_page = None
+            continue
+
+        list_page.page = page
+        if list_page.usernames or page == 1:
+            return list_page
+        error = PageLoadError(f"page {page} came back empty")
+        empty_page = list_page
+
+    if empty_page is not None and page >= (last_page or page):
+        return empty_page
+    raise PageLoadError(f"Could not load {url} after {retries + 1} attempts: {error}")
+
+
+def is_last_page(list_page, last_page=None):
+    """True at the end of the list: an empty page, or no next link and no higher page known"""
+    if not list_page.usernames:
+        return True
+    if list_page.has_next:
+        return False
+    return last_page is None or list_page.page >= last_page
+
+
+def iter_pages(backend, base_url, start=1, last_page=None, retries=2):
+    """Yield a list's pages one at a time, in order, until the last one
+
+    Each ListPage gets a `page` attribute. Stopping iteration early stops
+    the crawl. Raises PageLoadError if a page can't be loaded.
+    """
+    page = start
+    while True:
+        list_page = load_page_with_retry(backend, base_url, page, last_page, retries)
+        yield list_page
+
+        last_page = max(last_page or 0, list_page.last_page or 0) or None
+        if is_last_page(list_page, last_page):
+            return
+        page += 1
+
+
+class CrawlScheduler:
+    """Fetches a list's pages with bounded concurrency
+
+    Page 1 is loaded first to read the last page number from the pagination
+    widget; the remaining pages are then fetched by at most `concurrency`
+    workers and handed back in page order. Request rate is bounded by the
+    backend's shared RateLimiter, not by the number of workers.
+    """
+
+    def __init__(self, backend, concurrency=4, retries=2):
+        self.backend = backend
+        self.concurrency = concurrency
+        self.retries = retries
+
+    def iter_pages(self, base_url):
+        """Yield pages in order as they arrive
+
+        At most `concurrency` pages are in flight, and the next one is only
+        submitted as a page is handed out, so a slow consumer holds the crawl
+        a few pages ahead rather than the whole list. Closing the generator
+        early cancels any fetches that haven't started.
+        """
+        first = load_page_with_retry(self.backend, base_url, 1, retries=self.retries)
+        yield first
+
+        if is_last_page(first, first.last_page):
+            return
+
+        last_page = max(first.last_page or 2, 2)
+        pages = iter(range(2, last_page + 1))
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            futures = deque(
+                pool.submit(load_page_with_retry, self.backend, base_url, page, last_page, self.retries)
+                for page in islice(pages, self.concurrency)
+            )
+            while futures:
+                list_page = futures.popleft().result()
+                for page in islice(pages, 1):
+                    futures.append(pool.submit(
+                        load_page_with_retry, self.backend, base_url, page, last_page, self.retries
+                    ))
+                yield list_page
+                if not list_page.usernames:
+                    # The list shrank while crawling
+                    return
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        # The list may have grown while crawling; follow any further pages one by one
+        if list_page.has_next:
+            yield from iter_pages(self.backend, base_url, start=last_page + 1, retries=self.retries)
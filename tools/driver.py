@@ -0,0 +1,305 @@
+import os
+import statistics
+from collections import deque
+
+from selenium import webdriver
+
+from tracing import tracer
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Requests Chrome never makes in lean mode: posters/avatars, fonts, media and
+# third-party analytics/ad scripts. The pages the tools use still work
+# without any of them.
+BLOCKED_URLS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.m3u8",
+    "*google-analytics.com*", "*googletagmanager.com*", "*googlesyndication.com*",
+    "*doubleclick.net*", "*adservice.google.com*", "*amazon-adsystem.com*",
+    "*scorecardresearch.com*", "*quantserve.com*", "*facebook.net*",
+    "*twitter.com/widgets*", "*pubmatic.com*", "*adnxs.com*", "*criteo.com*",
+]
+
+BLOCKED_CONTENT = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.managed_default_content_settings.notifications": 2,
+}
+
+
+def create_driver(lean=False):
+    """Create a Chrome driver
+
+    Lean mode runs headless with the 'eager' page load strategy (don't wait
+    for subresources) and blocks images, media, fonts and third-party scripts.
+    """
+    options = webdriver.ChromeOptions()
+    options.add_argument('--disable-blink-features=AutomationControlled')
+
+    if lean:
+        options.add_argument('--headless=new')
+        options.add_argument('--window-size=1366,900')
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_experimental_option("prefs", BLOCKED_CONTENT)
+        options.page_load_strategy = 'eager'
+    else:
+        options.add_argument('--start-maximized')
+
+    driver = webdriver.Chrome(options=options)
+
+    if lean:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+
+    return driver
+
+
+def _proc_rss(pid):
+    """RSS of a single process from /proc, in bytes"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _proc_children(pid):
+    """All descendant pids of pid, read from /proc"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name can contain spaces, the ppid follows the closing paren
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+
+    children = []
+    stack = [pid]
+    while stack:
+        for child in parents.get(stack.pop(), []):
+            children.append(child)
+            stack.append(child)
+    return children
+
+
+def browser_rss(driver):
+    """Total RSS of chromedriver and every browser process under it, or None"""
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return None
+
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes if p.is_running())
+        except psutil.Error:
+            return None
+
+    if not os.path.isdir("/proc"):
+        return None
+    return sum(_proc_rss(p) for p in [pid] + _proc_children(pid))
+
+
+class DriverStats:
+    """Page load timings and peak browser memory for one driver"""
+
+    def __init__(self, driver, lean=False, window=10):
+        self.driver = driver
+        self.lean = lean
+        self.page_loads = 0
+        self.load_time = 0.0
+        self.peak_rss = None
+        # Browser RSS after the latest page load
+        self.rss = None
+        # Load times of the first and the latest `window` pages, for spotting a slowing browser
+        self.first_loads = []
+        self.recent_loads = deque(maxlen=window)
+        # Totals carried over from browsers this run already recycled
+        self.recycles = 0
+        self.earlier_loads = 0
+        self.earlier_time = 0.0
+
+    def record_page_load(self, seconds):
+        self.page_loads += 1
+        self.load_time += seconds
+        if len(self.first_loads) < self.recent_loads.maxlen:
+            self.first_loads.append(seconds)
+        self.recent_loads.append(seconds)
+        rss = browser_rss(self.driver)
+        if rss is not None:
+            self.rss = rss
+            self.peak_rss = max(self.peak_rss or 0, rss)
+
+    def slowdown(self):
+        """Median of the recent page loads over the median of the first ones, None until both are full"""
+        if len(self.first_loads) < self.recent_loads.maxlen or self.page_loads < 2 * self.recent_loads.maxlen:
+            return None
+        baseline = statistics.median(self.first_loads)
+        return statistics.median(self.recent_loads) / baseline if baseline > 0 else None
+
+    def carry_over(self, previous):
+        """Fold a recycled browser's totals into these, for one report per run"""
+        self.recycles = previous.recycles + 1
+        self.earlier_loads = previous.earlier_loads + previous.page_loads
+        self.earlier_time = previous.earlier_time + previous.load_time
+        if previous.peak_rss is not None:
+            self.peak_rss = max(self.peak_rss or 0, previous.peak_rss)
+
+    def report(self):
+        """Print a one-block summary so lean mode can be compared with normal mode"""
+        mode = "lean (headless, eager, assets blocked)" if self.lean else "normal"
+        print("\n" + "="*50)
+        print("BROWSER STATS")
+        print("="*50)
+        print(f"Mode: {mode}")
+        page_loads = self.earlier_loads + self.page_loads
+        if page_loads:
+            print(f"Page loads: {page_loads}, avg {(self.earlier_time + self.load_time) / page_loads:.2f}s per page")
+        else:
+            print("Page loads: 0")
+        if self.recycles:
+            print(f"Browser restarts: {self.recycles}")
+        if self.peak_rss is not None:
+            print(f"Peak browser RSS: {self.peak_rss / (1024 * 1024):.0f} MB")
+        else:
+            print("Peak browser RSS: n/a")
+        print("="*50)
+
+
+def driver_alive(driver):
+    """True if the WebDriver session still answers"""
+    if driver is None:
+        return False
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+class DriverLost(Exception):
+    """The browser died or degraded and a fresh one couldn't be logged in"""
+
+
+class DriverSupervisor:
+    """Restarts a tool's browser before a long run wears it out
+
+    Call check() before each action. The browser is recycled after
+    `max_navigations` page loads, once its RSS passes `max_rss_mb`, when
+    recent page loads have become `max_slowdown` times slower than the
+    first ones, or when the session stops answering (checked every
+    `liveness_every` actions and after any failed one). Recycling quits
+    the browser, runs the tool's setup_driver() and ensure_logged_in()
+    again - which restores the saved session cookies - and the run
+    carries on with the next action.
+
+    Works with any tool that has those two methods and `driver`,
+    `driver_stats` and `manager` attributes.
+    """
+
+    def __init__(self, tool, max_navigations=400, max_rss_mb=1500, max_slowdown=3.0, liveness_every=25):
+        self.tool = tool
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+        self.max_slowdown = max_slowdown
+        self.liveness_every = liveness_every
+        self._checks = 0
+
+    def reason(self, failed=False):
+        """Why the browser should be recycled now, or None if it's healthy"""
+        stats = self.tool.driver_stats
+        self._checks += 1
+        if (failed or self._checks % self.liveness_every == 0) and not driver_alive(self.tool.driver):
+            return "session lost"
+        if stats is None:
+            return None
+        if self.max_navigations and stats.page_loads >= self.max_navigations:
+            return f"{stats.page_loads} page loads"
+        if self.max_rss_mb and stats.rss is not None and stats.rss > self.max_rss_mb * 1024 * 1024:
+            return f"browser using {stats.rss / (1024 * 1024):.0f} MB"
+        slowdown = stats.slowdown()
+        if self.max_slowdown and slowdown is not None and slowdown >= self.max_slowdown:
+            return f"page loads {slowdown:.1f}x slower than at the start"
+        return None
+
+    def check(self, failed=False):
+        """Recycle the browser if it needs it, returns True if it was recycled
+
+        Pass failed=True after an action failed, so the session is checked
+        straight away. Raises DriverLost if the new browser can't log in.
+        """
+        reason = self.reason(failed)
+        if reason is None:
+            return False
+        self.recycle(reason)
+        return True
+
+    def recycle(self, reason):
+        tool = self.tool
+        print(f"\n♻️  Restarting the browser ({reason})...")
+        tracer.count("driver.recycle")
+        previous = tool.driver_stats
+        with tracer.span("driver.recycle"):
+            if tool.manager:
+                tool.manager.shutdown()
+            else:
+                try:
+                    tool.driver.quit()
+                except Exception:
+                    pass
+            tool.driver = None
+            tool.setup_driver()
+            if previous is not None:
+                tool.driver_stats.carry_over(previous)
+            if not tool.ensure_logged_in():
+                raise DriverLost(f"Browser restarted ({reason}) but logging back in failed")
+        self._checks = 0
+
+
+class DriverManager:
+    """Keeps one warm, logged-in browser alive across menu actions
+
+    Tools given a manager borrow its driver instead of starting and quitting
+    their own; the owner calls shutdown() when the program exits.
+    """
+
+    def __init__(self):
+        self.driver = None
+        self.lean = None
+        self.logged_in_as = None
+
+    def is_alive(self):
+        return driver_alive(self.driver)
+
+    def get(self, lean=False):
+        """The shared driver, (re)started if it died or the mode changed"""
+        if self.driver is not None and (self.lean != lean or not self.is_alive()):
+            self.shutdown()
+
+        if self.driver is None:
+            print("Starting browser...")
+            self.driver = create_driver(lean=lean)
+            self.lean = lean
+        return self.driver
+
+    def shutdown(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+        self.driver = None
+        self.logged_in_as = None
@@ -0,0 +1,226 @@
+import sqlite3
+import threading
+import time
+
+from snapshots import DEFAULT_DB_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    account TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    username TEXT NOT NULL,
+    type TEXT NOT NULL,
+    at REAL NOT NULL,
+    source TEXT NOT NULL,
+    compacted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_events_time
+    ON events (account, at);
+CREATE INDEX IF NOT EXISTS idx_events_user
+    ON events (account, username, at);
+
+CREATE TABLE IF NOT EXISTS event_totals (
+    account TEXT NOT NULL,
+    month TEXT NOT NULL,
+    type TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (account, month, type)
+) WITHOUT ROWID;
+"""
+
+# Event types per list: (joined the list, left the list)
+CHANGE_TYPES = {
+    "following": ("followed", "unfollowed"),
+    "followers": ("gained_follower", "lost_follower"),
+}
+EVENT_TYPES = {event_type: kind for kind, types in CHANGE_TYPES.items() for event_type in types}
+EVENT_LABELS = {
+    "followed": "you followed",
+    "unfollowed": "you unfollowed",
+    "gained_follower": "followed you",
+    "lost_follower": "unfollowed you",
+}
+
+EVENT_COLUMNS = "id, account, kind, username, type, at, source, compacted"
+
+# Usernames per IN (...) query, well under SQLite's bound parameter limit
+LOOKUP_CHUNK = 500
+
+
+class Event:
+    """One change to an account's following or followers list"""
+
+    def __init__(self, id, account, kind, username, type, at, source, compacted=False):
+        self.id = id
+        self.account = account
+        self.kind = kind
+        self.username = username
+        self.type = type
+        self.at = at
+        # "crawl" when seen between two crawls, "action" when one of the tools did it
+        self.source = source
+        # True for a user's last event kept when older history was compacted
+        self.compacted = bool(compacted)
+
+    def as_dict(self):
+        return {
+            "username": self.username, "type": self.type, "at": self.at,
+            "source": self.source, "compacted": self.compacted,
+        }
+
+
+class EventLog:
+    """Append-only log of follow/unfollow events, in the snapshot database
+
+    Events come from the difference between consecutive crawls and from
+    the tools' own follows and unfollows. Indexes on (account, time) and
+    (account, user, time) keep range and per-user queries fast however
+    long the log gets.
+
+    compact() bounds its size: events older than `retention` seconds are
+    folded into per-month totals, keeping only each user's last event so
+    their current state and when it changed stay answerable. It runs at
+    most once every `compact_every` seconds per account (compact_if_due).
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, retention=365 * 86400, compact_every=30 * 86400):
+        self.path = path
+        self.retention = retention
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def _events(self, query, params):
+        with self._lock:
+            rows = self.conn.execute(f"SELECT {EVENT_COLUMNS} FROM events WHERE {query}", params).fetchall()
+        return [Event(*row) for row in rows]
+
+    def record(self, account, username, event_type, at=None, source="action"):
+        """Append one event"""
+        self.record_many(account, [username], event_type, at, source)
+
+    def record_many(self, account, usernames, event_type, at=None, source="action"):
+        kind = EVENT_TYPES[event_type]
+        at = at or time.time()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO events (account, kind, username, type, at, source) VALUES (?, ?, ?, ?, ?, ?)",
+                ((account.lower(), kind, username, event_type, at, source) for username in usernames),
+            )
+
+    def latest_types(self, account, kind, usernames):
+        """Each user's most recent event type on one list, {username: type}"""
+        usernames = list(usernames)
+        latest = {}
+        with self._lock:
+            for start in range(0, len(usernames), LOOKUP_CHUNK):
+                chunk = usernames[start:start + LOOKUP_CHUNK]
+                rows = self.conn.execute(
+                    "SELECT username, type, max(id) FROM events WHERE account = ? AND kind = ?"
+                    f" AND username IN ({', '.join('?' * len(chunk))}) GROUP BY username",
+                    (account.lower(), kind, *chunk),
+                ).fetchall()
+                latest.update((username, event_type) for username, event_type, _ in rows)
+        return latest
+
+    def record_changes(self, account, kind, added, removed, at=None):
+        """Log the users who joined and left a list between two crawls
+
+        Users whose last event already says so (say the unfollow tool just
+        logged the unfollow) aren't logged twice. Returns the number of
+        events written.
+        """
+        joined_type, left_type = CHANGE_TYPES[kind]
+        latest = self.latest_types(account, kind, [*added, *removed])
+        joined = [user for user in added if latest.get(user) != joined_type]
+        left = [user for user in removed if latest.get(user) != left_type]
+        at = at or time.time()
+        self.record_many(account, joined, joined_type, at, source="crawl")
+        self.record_many(account, left, left_type, at, source="crawl")
+        return len(joined) + len(left)
+
+    def user_history(self, account, username):
+        """Every stored event for one user, oldest first"""
+        return self._events("account = ? AND username = ? ORDER BY at, id", (account.lower(), username))
+
+    def between(self, account, start=None, end=None, types=None):
+        """Events in [start, end), oldest first, optionally only some types"""
+        query = "account = ? AND at >= ? AND at < ?"
+        params = [account.lower(), start or 0, end or float("inf")]
+        if types:
+            query += f" AND type IN ({', '.join('?' * len(types))})"
+            params.extend(types)
+        return self._events(query + " ORDER BY at, id", params)
+
+    def counts(self, account, start=None, end=None):
+        """Number of events of each type in [start, end), from the uncompacted log"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT type, COUNT(*) FROM events WHERE account = ? AND at >= ? AND at < ?"
+                " AND compacted = 0 GROUP BY type",
+                (account.lower(), start or 0, end or float("inf")),
+            ).fetchall()
+        return dict(rows)
+
+    def monthly_totals(self, account):
+        """{month: {type: count}} over the whole history, compacted months included"""
+        totals = {}
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT month, type, count FROM event_totals WHERE account = ?", (account.lower(),)
+            ).fetchall()
+            rows += self.conn.execute(
+                "SELECT strftime('%Y-%m', at, 'unixepoch', 'localtime'), type, COUNT(*) FROM events"
+                " WHERE account = ? AND compacted = 0 GROUP BY 1, 2",
+                (account.lower(),),
+            ).fetchall()
+        for month, event_type, count in rows:
+            month_totals = totals.setdefault(month, {})
+            month_totals[event_type] = month_totals.get(event_type, 0) + count
+        return dict(sorted(totals.items()))
+
+    def compact(self, account, before):
+        """Fold an account's events older than `before` into monthly totals
+
+        Each user keeps their last event (marked compacted); everything
+        else before the cutoff is deleted. Returns the number of events removed.
+        """
+        account = account.lower()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO event_totals (account, month, type, count)"
+                " SELECT account, strftime('%Y-%m', at, 'unixepoch', 'localtime'), type, COUNT(*) FROM events"
+                " WHERE account = ? AND at < ? AND compacted = 0 GROUP BY 2, 3 ORDER BY 2, 3"
+                " ON CONFLICT (account, month, type) DO UPDATE SET count = count + excluded.count",
+                (account, before),
+            )
+            removed = self.conn.execute(
+                "DELETE FROM events WHERE account = ? AND at < ? AND id NOT IN"
+                " (SELECT max(id) FROM events WHERE account = ? GROUP BY kind, username)",
+                (account, before, account),
+            ).rowcount
+            self.conn.execute(
+                "UPDATE events SET compacted = 1 WHERE account = ? AND at < ? AND compacted = 0",
+                (account, before),
+            )
+        return removed
+
+    def compact_if_due(self, account):
+        """Compact history past the retention period once enough of it has built up
+
+        Returns the number of events removed (0 when nothing was due).
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT min(at) FROM events WHERE account = ? AND compacted = 0", (account.lower(),)
+            ).fetchone()
+        cutoff = time.time() - self.retention
+        if row[0] is None or row[0] >= cutoff - self.compact_every:
+            return 0
+        return self.compact(account, cutoff)
+
+    def close(self):
+        self.conn.close()
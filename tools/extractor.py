@@ -0,0 +1,303 @@
+import re
+from html.parser import HTMLParser
+
+# Collects every profile href on the page in a single WebDriver round trip.
+# Selectors match the ones the tools used element by element before.
+USER_LINKS_SCRIPT = """
+var hrefs = [];
+document.querySelectorAll('div.person-summary a.avatar, a.name').forEach(function (link) {
+    if (link.href) {
+        hrefs.push(link.href);
+    }
+});
+return hrefs;
+"""
+
+# Reads the pagination widget: whether there's a next page and the highest
+# page number it links to (the widget always shows the last page).
+PAGINATION_SCRIPT = """
+var last = null;
+document.querySelectorAll('.pagination a[href]').forEach(function (link) {
+    var match = link.getAttribute('href').match(/\\/page\\/(\\d+)\\/?$/);
+    if (match) {
+        last = Math.max(last || 0, parseInt(match[1], 10));
+    }
+});
+return [document.querySelector('a.next') !== null, last];
+"""
+
+# One entry per person row: [href, display name, metadata text, watched, lists, likes]
+# as raw text, so the browser and the HTML parser share record_from_row().
+USER_ROWS_SCRIPT = """
+var rows = [];
+document.querySelectorAll('div.person-summary').forEach(function (summary) {
+    var link = summary.querySelector('a.name') || summary.querySelector('a.avatar');
+    if (!link || !link.href) {
+        return;
+    }
+    var row = summary.closest('tr') || summary;
+    var text = function (selector) {
+        var element = row.querySelector(selector);
+        return element ? element.textContent : null;
+    };
+    rows.push([link.href, text('a.name'), text('small.metadata'),
+               text('td.col-watched'), text('td.col-lists'), text('td.col-likes')]);
+});
+return rows;
+"""
+
+PAGE_NUMBER = re.compile(r"/page/(\d+)/?$")
+
+# Profile header statistics: <a href="/user/followers/"><span class="value">1,234</span>...
+PROFILE_COUNT = re.compile(
+    r'href="[^"]*/(following|followers)/"[^>]*>\s*<span class="value">([\d,]+)</span>'
+)
+
+# Row metadata, e.g. "1,234 followers, following 56"
+ROW_FOLLOWERS = re.compile(r"([\d.,]+[KkMm]?)\s+followers?")
+ROW_FOLLOWING = re.compile(r"following\s+([\d.,]+[KkMm]?)")
+
+# Text collected per row while parsing: field -> class of the element holding it
+ROW_TEXT_FIELDS = {"metadata": "metadata", "watched": "col-watched", "lists": "col-lists", "likes": "col-likes"}
+
+# UserRecord attributes, in export column order
+RECORD_FIELDS = ("username", "display_name", "followers", "following", "watched", "lists", "likes")
+# The numeric ones, which users can be ranked by
+ROW_COUNTS = RECORD_FIELDS[2:]
+
+
+class UserRecord:
+    """What a list page row shows about one user
+
+    Slotted, since a crawl of a big account holds one per user. Counts the
+    row didn't show (or that couldn't be read) are None.
+    """
+
+    __slots__ = RECORD_FIELDS
+
+    def __init__(self, username, display_name=None, followers=None, following=None,
+                 watched=None, lists=None, likes=None):
+        self.username = username
+        self.display_name = display_name
+        self.followers = followers
+        self.following = following
+        self.watched = watched
+        self.lists = lists
+        self.likes = likes
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in RECORD_FIELDS}
+
+    def __repr__(self):
+        return f"UserRecord({self.username!r}, watched={self.watched}, followers={self.followers})"
+
+
+def parse_count(text):
+    """Number from a row count such as '1,234', '12.5K' or '2M', None if there isn't one"""
+    if not text:
+        return None
+    text = text.strip().replace(",", "")
+    multiplier = 1
+    if text[-1:] in ("K", "k"):
+        multiplier, text = 1000, text[:-1]
+    elif text[-1:] in ("M", "m"):
+        multiplier, text = 1000000, text[:-1]
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        return None
+
+
+def record_from_row(href, name=None, metadata=None, watched=None, lists=None, likes=None):
+    """Build a UserRecord from a row's raw text, None if the href isn't a profile"""
+    username = username_from_href(href)
+    if not username:
+        return None
+    metadata = metadata or ""
+    followers = ROW_FOLLOWERS.search(metadata)
+    following = ROW_FOLLOWING.search(metadata)
+    return UserRecord(
+        username,
+        display_name=" ".join(name.split()) if name and name.strip() else None,
+        followers=parse_count(followers.group(1)) if followers else None,
+        following=parse_count(following.group(1)) if following else None,
+        watched=parse_count(watched),
+        lists=parse_count(lists),
+        likes=parse_count(likes),
+    )
+
+
+def username_from_href(href):
+    """Turn a profile href (relative or absolute) into a username"""
+    if not href:
+        return None
+    username = href.strip().strip("/").split("/")[-1]
+    return username or None
+
+
+def dedupe_usernames(hrefs, exclude=None):
+    """Convert hrefs to usernames, dropping blanks, duplicates and excluded names"""
+    usernames = {}
+    for href in hrefs:
+        username = username_from_href(href)
+        if username and username != exclude:
+            usernames[username] = None
+    return list(usernames)
+
+
+class ListPageParser(HTMLParser):
+    """Single-pass parser for following/followers list page HTML
+
+    Besides the profile hrefs it reads each person row's display name and
+    counts into `records` (username -> UserRecord), in the same pass.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.hrefs = []
+        self.has_next = False
+        # Highest page number linked from the pagination widget, if any
+        self.last_page = None
+        self.records = {}
+        self._person_depth = 0
+        # Raw text of the row being read: [href, name, metadata, watched, lists, likes]
+        self._row = None
+        # Row field whose text is being collected, with the tag that closes it and its nesting
+        self._field = None
+        self._field_tag = None
+        self._field_depth = 0
+
+    def _start_row(self, href):
+        self._finish_row()
+        self._row = {"href": href}
+
+    def _finish_row(self):
+        if self._row is None:
+            return
+        row, self._row = self._row, None
+        record = record_from_row(
+            row["href"], row.get("name"), row.get("metadata"), row.get("watched"), row.get("lists"), row.get("likes")
+        )
+        if record and record.username not in self.records:
+            self.records[record.username] = record
+
+    def _collect(self, field, tag):
+        self._field, self._field_tag, self._field_depth = field, tag, 1
+        self._row[field] = ""
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+
+        if self._field and tag == self._field_tag:
+            self._field_depth += 1
+
+        if self._row is not None and not self._field:
+            for field, css_class in ROW_TEXT_FIELDS.items():
+                if css_class in classes:
+                    self._collect(field, tag)
+                    break
+
+        if tag == "div":
+            if self._person_depth:
+                self._person_depth += 1
+            elif "person-summary" in classes:
+                self._person_depth = 1
+            return
+
+        if tag != "a":
+            return
+
+        page_number = PAGE_NUMBER.search(attrs.get("href") or "")
+        if page_number:
+            self.last_page = max(self.last_page or 0, int(page_number.group(1)))
+
+        if "next" in classes:
+            self.has_next = True
+        elif "name" in classes or (self._person_depth and "avatar" in classes):
+            href = attrs.get("href")
+            if href:
+                self.hrefs.append(href)
+                if self._row is None or username_from_href(self._row["href"]) != username_from_href(href):
+                    self._start_row(href)
+                if "name" in classes and not self._field:
+                    self._collect("name", tag)
+
+    def handle_data(self, data):
+        if self._field:
+            self._row[self._field] += data
+
+    def handle_endtag(self, tag):
+        if self._field and tag == self._field_tag:
+            self._field_depth -= 1
+            if not self._field_depth:
+                self._field = None
+        if tag == "div" and self._person_depth:
+            self._person_depth -= 1
+        elif tag in ("tr", "table", "section") and not self._field:
+            self._finish_row()
+
+    def close(self):
+        super().close()
+        self._finish_row()
+
+
+def parse_list_page(html):
+    """Parse list page HTML, returns the parser with hrefs, records and has_next filled in"""
+    parser = ListPageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def parse_profile_counts(html):
+    """Following/followers counts shown on a profile page, e.g. {"followers": 1234}"""
+    counts = {}
+    for kind, value in PROFILE_COUNT.findall(html):
+        counts.setdefault(kind, int(value.replace(",", "")))
+    return counts
+
+
+def parse_usernames(html, exclude=None, ordered=False):
+    """Extract usernames from list page HTML in one parse"""
+    usernames = dedupe_usernames(parse_list_page(html).hrefs, exclude)
+    return usernames if ordered else set(usernames)
+
+
+def extract_usernames(driver, exclude=None, ordered=False):
+    """Extract usernames from the driver's current page in one call
+
+    Runs a single script to collect every profile link, falling back to
+    parsing page_source if script execution is unavailable.
+    """
+    try:
+        hrefs = driver.execute_script(USER_LINKS_SCRIPT) or []
+    except Exception:
+        hrefs = parse_list_page(driver.page_source).hrefs
+
+    usernames = dedupe_usernames(hrefs, exclude)
+    return usernames if ordered else set(usernames)
+
+
+def extract_records(driver, exclude=None):
+    """Usernames (in page order) and their row records from the driver's current page
+
+    One script call reads every row; falls back to parsing page_source, and
+    to extract_usernames() with no records if the page has no person rows.
+    Returns (usernames, {username: UserRecord}).
+    """
+    try:
+        rows = driver.execute_script(USER_ROWS_SCRIPT) or []
+        records = {}
+        for row in rows:
+            record = record_from_row(*row)
+            if record and record.username not in records:
+                records[record.username] = record
+    except Exception:
+        parsed = parse_list_page(driver.page_source)
+        return dedupe_usernames(parsed.hrefs, exclude), parsed.records
+
+    if not records:
+        return extract_usernames(driver, exclude, ordered=True), {}
+    records.pop(exclude, None)
+    return list(records), records
@@ -1,27 +1,65 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import time
 
+from backends import SITE_URL
+from driver import DriverStats, DriverSupervisor, create_driver
+from events import EventLog
+from extractor import extract_usernames
+from session import SessionStore, restore_or_login
+from tracing import tracer
+from waits import (
+    PageWaiter,
+    follow_button_ready,
+    following_button_visible,
+    list_page_ready,
+    login_complete,
+)
+
 class LetterboxdFollowBot:
-    def __init__(self, username, password):
+    def __init__(self, username, password, wait_timeout=10, min_page_delay=0.5, lean=False,
+                 manager=None, site_url=SITE_URL, pause_on_exit=True, events=None,
+                 recycle_after=400, max_browser_mb=1500):
         self.username = username
         self.password = password
+        self.site_url = site_url
         self.driver = None
+        self.sessions = SessionStore()
+        self.waiter = None
+        # Lean mode: headless, eager page loads, images/fonts/third-party scripts blocked
+        self.lean = lean
+        self.driver_stats = None
+        # Shared DriverManager from the menu; when set the browser outlives this tool
+        self.manager = manager
+        # Restarts the browser during long runs before it slows down or dies
+        self.supervisor = DriverSupervisor(self, max_navigations=recycle_after, max_rss_mb=max_browser_mb)
+        self.wait_timeout = wait_timeout
+        self.min_page_delay = min_page_delay
+        # False for unattended runs (cron, the CLI): never wait for Enter
+        self.pause_on_exit = pause_on_exit
+        # Totals of the last run, returned by run()
+        self.summary = None
+        # Follows are logged so the history shows when each one happened
+        self.events = events if events is not None else EventLog()
         
     def setup_driver(self):
         """Initialize Chrome driver with options"""
-        options = webdriver.ChromeOptions()
-        options.add_argument('--start-maximized')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        self.driver = webdriver.Chrome(options=options)
+        with tracer.span("driver.startup"):
+            if self.manager:
+                self.driver = self.manager.get(lean=self.lean)
+            else:
+                self.driver = create_driver(lean=self.lean)
+        self.driver_stats = DriverStats(self.driver, lean=self.lean)
+        self.waiter = PageWaiter(
+            self.driver, timeout=self.wait_timeout, min_delay=self.min_page_delay, stats=self.driver_stats
+        )
         
     def login(self):
         """Login to Letterboxd"""
         print("Logging in...")
-        self.driver.get("https://letterboxd.com/sign-in/")
+        self.waiter.get(f"{self.site_url}/sign-in/")
         
         try:
             username_field = WebDriverWait(self.driver, 10).until(
@@ -52,7 +90,7 @@ class LetterboxdFollowBot:
             else:
                 submit_btn.click()
             
-            time.sleep(3)
+            self.waiter.wait_for(login_complete)
             
             try:
                 self.driver.find_element(By.CSS_SELECTOR, "a.avatar")
@@ -66,44 +104,43 @@ class LetterboxdFollowBot:
             print(f"Login failed: {e}")
             return False
     
-    def get_users_from_page(self):
-        """Extract all usernames from the current page"""
-        usernames = []
-        
-        try:
-            person_divs = self.driver.find_elements(By.CSS_SELECTOR, "div.person-summary")
-            for person in person_divs:
-                try:
-                    avatar_link = person.find_element(By.CSS_SELECTOR, "a.avatar")
-                    href = avatar_link.get_attribute("href")
-                    if href:
-                        username = href.strip("/").split("/")[-1]
-                        if username and username != "" and username != self.username:
-                            usernames.append(username)
-                except:
-                    pass
-        except:
-            pass
+    def ensure_logged_in(self):
+        """Reuse the saved session when it's still valid, otherwise log in"""
+        if self.manager:
+            if self.manager.logged_in_as == self.username.lower():
+                return True
+            # The warm browser may still hold another account's cookies
+            self.driver.delete_all_cookies()
         
-        # Fallback method
-        try:
-            name_links = self.driver.find_elements(By.CSS_SELECTOR, "a.name")
-            for link in name_links:
-                href = link.get_attribute("href")
-                if href:
-                    username = href.strip("/").split("/")[-1]
-                    if username and username != "" and username != self.username and username not in usernames:
-                        usernames.append(username)
-        except:
-            pass
+        with tracer.span("login") as span:
+            if not restore_or_login(self, self.sessions):
+                span.fail()
+                return False
         
-        return usernames
+        if self.manager:
+            self.manager.logged_in_as = self.username.lower()
+        return True
+    
+    def close_driver(self):
+        """Report browser stats and quit, unless the browser is shared"""
+        if self.driver_stats:
+            self.driver_stats.report()
+        if self.manager:
+            if self.pause_on_exit:
+                input("\nPress Enter to return to the menu...")
+        elif self.driver:
+            if self.pause_on_exit:
+                input("\nPress Enter to close browser...")
+            self.driver.quit()
+    
+    def get_users_from_page(self):
+        """Extract all usernames from the current page in a single round trip"""
+        return extract_usernames(self.driver, exclude=self.username, ordered=True)
     
     def follow_user(self, username):
         """Follow a specific user"""
         try:
-            self.driver.get(f"https://letterboxd.com/{username}/")
-            time.sleep(1.5)
+            self.waiter.get(f"{self.site_url}/{username}/", follow_button_ready)
             
             # Look specifically for the follow button with the correct classes
             try:
@@ -125,12 +162,11 @@ class LetterboxdFollowBot:
                     return False  # Button not found
                 
                 # Click using JavaScript to avoid any overlay issues
+                self.waiter.limiter.acquire()
                 self.driver.execute_script("arguments[0].click();", follow_btn)
-                time.sleep(1)
                 
-                # Verify it worked by checking if button changed to following
-                verify_buttons = self.driver.find_elements(By.CSS_SELECTOR, "button.js-button-following, a.js-button-following")
-                if any(btn.is_displayed() for btn in verify_buttons):
+                # Verify it worked by waiting for the button to change to following
+                if self.waiter.wait_for(following_button_visible, timeout=3):
                     return True  # Successfully followed
                 else:
                     return False  # Click didn't work
@@ -147,7 +183,7 @@ class LetterboxdFollowBot:
         print(f"Following users from @{target_username}")
         print("="*50)
         
-        base_url = f"https://letterboxd.com/{target_username}/following/"
+        base_url = f"{self.site_url}/{target_username}/following/"
         page = 1
         total_followed = 0
         total_skipped = 0
@@ -161,11 +197,11 @@ class LetterboxdFollowBot:
             # Navigate to the page
             url = f"{base_url}page/{page}/" if page > 1 else base_url
             print(f"\n📄 Loading page {page}...")
-            self.driver.get(url)
-            time.sleep(2)
+            self.waiter.get(url, list_page_ready)
             
             # Get users from this page
-            page_users = self.get_users_from_page()
+            with tracer.span("extract.script"):
+                page_users = self.get_users_from_page()
             
             if not page_users:
                 print("No more users found. Finished!")
@@ -182,10 +218,22 @@ class LetterboxdFollowBot:
                 
                 print(f"  [{i}/{len(page_users)}] Attempting to follow @{user}...", end=" ")
                 
-                success = self.follow_user(user)
+                self.supervisor.check()
+                with tracer.span("action.follow") as span:
+                    success = self.follow_user(user)
+                    if success is False and self.supervisor.check(failed=True):
+                        # The browser was gone or worn out; try again with the fresh one
+                        success = self.follow_user(user)
+                    if success is False:
+                        span.fail()
+                        # A run of failures usually means we're being throttled
+                        self.waiter.limiter.failure()
+                    else:
+                        self.waiter.limiter.success()
                 
                 if success is True:
                     total_followed += 1
+                    self.events.record(self.username, user, "followed")
                     print(f"✓ Followed! (Total: {total_followed})")
                 elif success is None:
                     total_skipped += 1
@@ -212,29 +260,33 @@ class LetterboxdFollowBot:
         print("\n" + "="*50)
         print("SUMMARY")
         print("="*50)
+        tracer.count("followed", total_followed)
+        tracer.count("skipped", total_skipped)
+        self.summary = {"target": target_username, "followed": total_followed, "skipped": total_skipped}
         print(f"Successfully followed: {total_followed} users")
         print(f"Skipped: {total_skipped} users")
         print("="*50)
     
     def run(self, target_username, max_follows=None, delay_between_follows=2):
-        """Main execution flow"""
+        """Main execution flow, returns the summary dict or None if it didn't run"""
+        tracer.reset()
         try:
             self.setup_driver()
             
-            if not self.login():
+            if not self.ensure_logged_in():
                 return
             
-            time.sleep(2)
-            
             self.follow_users_from_target(target_username, max_follows, delay_between_follows)
             
         except Exception as e:
             print(f"\nError during execution: {e}")
         
         finally:
-            if self.driver:
-                input("\nPress Enter to close browser...")
-                self.driver.quit()
+            self.events.close()
+            tracer.finish("follow_bot")
+            self.close_driver()
+        
+        return self.summary
 
 
 if __name__ == "__main__":
@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import time
+
+DEFAULT_JOURNAL_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "journals"
+)
+
+# Outcomes that mean a user needs no more work; failed users are retried on resume
+FINISHED = ("done", "skipped")
+
+
+class RunJournal:
+    """Append-only JSON-lines log of one unfollow run
+
+    Records the plan (who is going to be unfollowed, and on which following
+    page) and the outcome for every user as it happens, so a run that dies
+    part way can be resumed without re-crawling. Writes are fsynced in
+    batches of `sync_every` entries or every `sync_interval` seconds; the
+    plan and the end of the run are synced straight away.
+    """
+
+    def __init__(self, path, sync_every=10, sync_interval=2.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._pending = 0
+        if self._file.tell() and not self._ends_with_newline():
+            # Terminate a torn last line so the next entry starts cleanly
+            self._file.write("\n")
+        self._last_sync = time.monotonic()
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    @classmethod
+    def create(cls, account, directory=DEFAULT_JOURNAL_DIR, **kwargs):
+        """Start a new journal for account, named after the start time"""
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        journal = cls(os.path.join(directory, f"{account.lower()}-{stamp}.jsonl"), **kwargs)
+        journal.write("start", account=account.lower(), sync=True)
+        return journal
+
+    def write(self, entry_type, sync=False, **fields):
+        entry = {"type": entry_type, "at": round(time.time(), 3)}
+        entry.update(fields)
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._pending += 1
+        if sync or self._pending >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        """Flush buffered entries and fsync them to disk"""
+        if not self._pending:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def plan(self, users, pages=None):
+        """Record the full list of users this run is going to work through"""
+        pages = pages or {}
+        self.write("plan", users=list(users), pages={u: pages[u] for u in users if u in pages}, sync=True)
+
+    def planned(self, user, page=None):
+        """Add one user to the plan (streamed runs find users as they go)"""
+        self.write("planned", user=user, page=page)
+
+    def record(self, outcome, user):
+        """Record a user's outcome: done, failed or skipped"""
+        self.write(outcome, user=user)
+
+    def finish(self, **totals):
+        self.write("finish", sync=True, **totals)
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+class JournalState:
+    """What a journal says about its run, rebuilt by replaying the entries"""
+
+    def __init__(self, path):
+        self.path = path
+        self.account = None
+        self.started_at = None
+        self.finished = False
+        self.plan = []
+        self.pages = {}
+        self.outcomes = {}
+
+    @property
+    def remaining(self):
+        """Planned users not yet done or skipped, in plan order"""
+        return [user for user in self.plan if self.outcomes.get(user) not in FINISHED]
+
+    def count(self, outcome):
+        return sum(1 for value in self.outcomes.values() if value == outcome)
+
+
+def load_journal(path):
+    """Replay a journal file into a JournalState
+
+    A torn last line (the process died mid-write) is ignored.
+    """
+    state = JournalState(path)
+    planned = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entry_type = entry.get("type")
+            if entry_type == "start":
+                state.account = entry.get("account")
+                state.started_at = entry.get("at")
+            elif entry_type in ("plan", "planned"):
+                # A resumed run re-plans what was left; keep earlier users too
+                users = entry["users"] if entry_type == "plan" else [entry["user"]]
+                for user in users:
+                    if user not in planned:
+                        planned.add(user)
+                        state.plan.append(user)
+                if entry_type == "plan":
+                    state.pages.update(entry.get("pages") or {})
+                elif entry.get("page"):
+                    state.pages[entry["user"]] = entry["page"]
+            elif entry_type == "finish":
+                state.finished = True
+            elif "user" in entry:
+                state.outcomes[entry["user"]] = entry_type
+    return state
+
+
+def find_resumable(account, directory=DEFAULT_JOURNAL_DIR):
+    """The account's latest journal, if that run didn't finish and has work left
+
+    Only the most recent run can be resumed; anything older was superseded.
+    """
+    if not os.path.isdir(directory):
+        return None
+    pattern = re.compile(re.escape(account.lower()) + r"-\d{8}-\d{6}\.jsonl")
+    names = [name for name in os.listdir(directory) if pattern.fullmatch(name)]
+    if not names:
+        return None
+    state = load_journal(os.path.join(directory, max(names)))
+    if state.finished or not state.remaining:
+        return None
+    return state
@@ -0,0 +1,347 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from backends import SITE_URL, HttpBackend
+from crawler import PAGE_SIZE, CrawlScheduler, iter_pages
+from events import EventLog
+from snapshots import SnapshotStore, format_age, merge_refresh
+from tracing import tracer
+
+
+class ListLoader:
+    """Loads one account's following/followers lists over the read-only backend
+
+    Crawls, incremental refreshes, snapshots, profile cross-checks and the
+    event log live here rather than in the unfollow tool, so anything that
+    only reads public lists (statistics, overlap) never imports selenium.
+    """
+
+    def __init__(self, username, backend=None, store=None, events=None, max_snapshot_age=None,
+                 incremental=True, full_sync_interval=7 * 86400, concurrency=4, site_url=SITE_URL):
+        self.username = username
+        self.site_url = site_url
+        # Saved lists younger than max_snapshot_age seconds are reused instead of re-crawled
+        self.store = store if store is not None else SnapshotStore()
+        # Follow/unfollow history, in the same database as the snapshots
+        self.events = events if events is not None else EventLog(self.store.path)
+        self.max_snapshot_age = max_snapshot_age
+        # Incremental refreshes stop at the first fully known page; a full
+        # crawl still happens whenever the last one is older than full_sync_interval
+        self.incremental = incremental
+        self.full_sync_interval = full_sync_interval
+        self.deltas = {}
+        # Counts from the profile header, to cross-check crawled lists against
+        self.profile_counts = None
+        # Lists whose crawl came out noticeably short of the profile count
+        self.incomplete = set()
+        # Pages fetched at once during full crawls (HTTP backend only)
+        self.concurrency = concurrency
+        # Read-only list pages are public, so they don't need the browser
+        self.backend = backend or HttpBackend()
+        self.following = set()
+        self.followers = set()
+        # Display name and counts (UserRecord) of everyone seen on a crawled list page
+        self.records = {}
+        # Page of your following list each user was last seen on
+        self.following_pages = {}
+
+    def iter_list_pages(self, base_url, concurrent=True):
+        """Yield list pages in order as they arrive, fetched ahead when the backend allows it"""
+        if concurrent and self.concurrency > 1 and getattr(self.backend, "concurrent", False):
+            return CrawlScheduler(self.backend, self.concurrency).iter_pages(base_url)
+        return iter_pages(self.backend, base_url)
+    
+    def crawl_pages(self, base_url, known=None):
+        """Crawl list pages in order, optionally stopping at the first fully known page
+        
+        Returns (users in list order, whether the end of the list was reached,
+        users on the last page loaded).
+        """
+        all_users = {}
+        page_users = []
+        
+        # Incremental refreshes usually stop after a page or two, so don't fetch ahead for them
+        with closing(self.iter_list_pages(base_url, concurrent=known is None)) as pages:
+            for list_page in pages:
+                if not list_page.usernames:
+                    # No users found, we've reached the end
+                    break
+                
+                page_users = list_page.usernames
+                all_users.update(dict.fromkeys(page_users))
+                self.records.update(list_page.records)
+                self.report_page(list_page, len(all_users))
+                
+                if known is not None and list_page.has_next and known.issuperset(page_users):
+                    print(f"  Page {list_page.page} is already known, stopping early")
+                    return list(all_users), False, page_users
+        
+        return list(all_users), True, page_users
+    
+    def report_page(self, list_page, total):
+        """Progress line for a loaded list page"""
+        kind = next((k for k in ("following", "followers") if f"/{k}/" in list_page.url), "list")
+        print(f"  [{kind}] Found {len(list_page.usernames)} users on page {list_page.page} (Total: {total})")
+    
+    def load_all_pages_by_url(self, base_url):
+        """Load all pages by directly navigating to page URLs"""
+        return set(self.crawl_pages(base_url)[0])
+    
+    def load_list(self, kind):
+        """Load a following/followers list from a fresh snapshot, or crawl and save it"""
+        snapshot = self.fresh_snapshot(kind)
+        if snapshot:
+            print(f"Using saved {kind} list from {format_age(snapshot.age)} ago")
+            if kind == "following" and self.store.is_ordered(snapshot.id):
+                self.remember_pages(snapshot.ordered_users())
+            return snapshot.users()
+        
+        base_url = f"{self.site_url}/{self.username}/{kind}/"
+        previous = self.store.latest(self.username, kind)
+        # Changes are counted from the last list that passed the profile
+        # check: diffing against a short crawl would log everyone it missed
+        # as a new follow once a full crawl finds them again
+        baseline = self.store.latest(self.username, kind, verified_only=True)
+        
+        with tracer.span(f"crawl.{kind}"):
+            if self.incremental and self.can_refresh(previous):
+                # can_refresh only accepts a verified previous, i.e. the baseline
+                print(f"Refreshing {kind} list incrementally...")
+                previous_users = previous.ordered_users()
+                fetched, complete, last_page = self.crawl_pages(base_url, known=set(previous_users))
+                users, added, removed = merge_refresh(previous_users, fetched, last_page, complete)
+            else:
+                users, complete, _ = self.crawl_pages(base_url)
+                previous_users = baseline.users() if baseline else set()
+                added = set(users) - previous_users
+                removed = previous_users - set(users)
+        tracer.count(f"users.{kind}", len(users))
+        if kind == "following":
+            self.remember_pages(users)
+        
+        verified = self.cross_check(kind, len(users))
+        with tracer.span("snapshot.save"):
+            # An unverified crawl isn't trusted as a baseline: can_refresh and
+            # fresh_snapshot skip it, so the next run does a full crawl
+            self.store.save(self.username, kind, users, full=complete, verified=verified)
+            self.save_records(users)
+        if baseline:
+            print(f"Changes since last crawl: +{len(added)} / -{len(removed)}")
+            if verified:
+                self.log_changes(kind, added, removed)
+        self.deltas[kind] = (added, removed)
+        return set(users)
+    
+    def log_changes(self, kind, added, removed):
+        """Append who joined and left a list since the previous crawl to the event log"""
+        self.events.record_changes(self.username, kind, added, removed)
+        self.events.compact_if_due(self.username)
+    
+    def save_records(self, users):
+        """Store the row metadata crawled for these users (carried-over users keep their old rows)"""
+        self.store.save_records(self.records[user] for user in users if user in self.records)
+    
+    def expected_count(self, kind):
+        """The list size shown on the profile, or None if it can't be read"""
+        if self.profile_counts is None:
+            try:
+                self.profile_counts = self.backend.profile_counts(f"{self.site_url}/{self.username}/")
+            except Exception as e:
+                print(f"Could not read profile counts: {str(e)[:80]}")
+                self.profile_counts = {}
+        return self.profile_counts.get(kind)
+    
+    def cross_check(self, kind, crawled):
+        """Compare a crawled list's size with the profile count, returns False if it's short
+        
+        A little slack is allowed for follows that happen during the crawl.
+        """
+        expected = self.expected_count(kind)
+        if expected is None:
+            return True
+        tolerance = max(2, expected // 200)
+        if crawled >= expected - tolerance:
+            self.incomplete.discard(kind)
+            return True
+        print(f"⚠️  Crawled {crawled} {kind} but the profile shows {expected} - the list looks incomplete")
+        tracer.count(f"crawl.incomplete.{kind}")
+        self.incomplete.add(kind)
+        return False
+    
+    def remember_pages(self, ordered_users):
+        """Record which following list page each user is on, from list order"""
+        self.following_pages = {user: i // PAGE_SIZE + 1 for i, user in enumerate(ordered_users)}
+    
+    def can_refresh(self, previous):
+        """Incremental refresh needs a verified, ordered previous snapshot and a recent verified full sync"""
+        if previous is None or not previous.verified or not self.store.is_ordered(previous.id):
+            return False
+        last_full = self.store.latest(
+            self.username, previous.kind, max_age=self.full_sync_interval, full_only=True, verified_only=True
+        )
+        return last_full is not None
+    
+    def get_following(self):
+        """Get list of users you follow"""
+        print("\n" + "="*50)
+        print("Getting following list...")
+        print("="*50)
+        
+        self.following = self.load_list("following")
+        
+        print(f"\nTotal following: {len(self.following)} users")
+        return self.following
+    
+    def get_followers(self):
+        """Get list of users who follow you"""
+        print("\n" + "="*50)
+        print("Getting followers list...")
+        print("="*50)
+        
+        self.followers = self.load_list("followers")
+        
+        print(f"\nTotal followers: {len(self.followers)} users")
+        return self.followers
+    
+    def get_following_and_followers(self):
+        """Get both lists, crawling them at the same time when the backend allows it
+        
+        Both crawls share the backend's rate limiter, so this doesn't raise
+        the overall request rate.
+        """
+        if not getattr(self.backend, "concurrent", False):
+            return self.get_following(), self.get_followers()
+        
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            following = pool.submit(self.get_following)
+            followers = pool.submit(self.get_followers)
+            return following.result(), followers.result()
+    
+    def stream_list(self, kind, until=None):
+        """Yield (list_page, users seen so far) for one of your lists as pages arrive
+        
+        Stops once until(list_page, seen) returns True, or whenever the
+        consumer stops iterating. Nothing is saved since the list may be partial.
+        """
+        seen = set()
+        with closing(self.iter_list_pages(f"{self.site_url}/{self.username}/{kind}/")) as pages:
+            for list_page in pages:
+                seen.update(list_page.usernames)
+                self.records.update(list_page.records)
+                yield list_page, len(seen)
+                if until and until(list_page, seen):
+                    return
+    
+    def stream_lists(self):
+        """Crawl following and followers together, yielding (kind, list_page, counts) as pages arrive
+        
+        counts holds the running size of each list. Once both crawls finish
+        they're saved as snapshots and stored on self.following/self.followers;
+        stopping early leaves both untouched.
+        """
+        events = queue.Queue()
+        stop = threading.Event()
+        ordered = {"following": {}, "followers": {}}
+        
+        def crawl(kind):
+            try:
+                with closing(self.iter_list_pages(f"{self.site_url}/{self.username}/{kind}/")) as pages:
+                    for list_page in pages:
+                        if stop.is_set():
+                            return
+                        events.put((kind, list_page, None))
+            except Exception as e:
+                events.put((kind, None, e))
+            finally:
+                events.put((kind, None, None))
+        
+        workers = [threading.Thread(target=crawl, args=(kind,), daemon=True) for kind in ordered]
+        for worker in workers:
+            worker.start()
+        
+        running = len(workers)
+        try:
+            while running:
+                kind, list_page, error = events.get()
+                if error is not None:
+                    raise error
+                if list_page is None:
+                    running -= 1
+                    continue
+                ordered[kind].update(dict.fromkeys(list_page.usernames))
+                self.records.update(list_page.records)
+                yield kind, list_page, {k: len(users) for k, users in ordered.items()}
+        finally:
+            stop.set()
+        
+        for kind, users in ordered.items():
+            previous = self.store.latest(self.username, kind, verified_only=True)
+            verified = self.cross_check(kind, len(users))
+            self.store.save(self.username, kind, list(users), verified=verified)
+            self.save_records(users)
+            if previous and verified:
+                previous_users = previous.users()
+                self.log_changes(kind, users.keys() - previous_users, previous_users - users.keys())
+            tracer.count(f"users.{kind}", len(users))
+        self.following = set(ordered["following"])
+        self.followers = set(ordered["followers"])
+        self.remember_pages(ordered["following"])
+    
+    def stream_non_mutuals(self, limit=None):
+        """Yield users you follow who don't follow back, as following pages arrive
+        
+        The followers list is loaded first (from a snapshot when possible);
+        the following crawl stops as soon as `limit` non-mutuals were found.
+        """
+        followers = self.get_followers()
+        if not self.followers_trusted():
+            return
+        seen = set()
+        found = 0
+        
+        for list_page, _ in self.stream_list("following"):
+            for user in list_page.usernames:
+                if user in followers or user in seen:
+                    continue
+                seen.add(user)
+                self.following_pages[user] = list_page.page
+                yield user
+                found += 1
+                if limit and found >= limit:
+                    return
+    
+    def non_mutuals(self):
+        """Users you follow who don't follow you back, from the loaded lists"""
+        return self.following - self.followers
+    
+    def followers_trusted(self):
+        """False (with a warning) if the followers crawl came out short
+        
+        A truncated followers list would make people who do follow you look
+        like non-mutuals, so nobody gets unfollowed on the back of one.
+        """
+        if "followers" not in self.incomplete:
+            return True
+        print("\n" + "="*50)
+        print("Your followers list looks incomplete, so nobody will be unfollowed.")
+        print("Run again in a while (or with a longer delay) to get a full list.")
+        print("="*50)
+        return False
+    
+    def fresh_snapshot(self, kind):
+        """The saved list load_list would reuse instead of crawling, or None
+
+        A short (unverified) crawl is never reused: it would make people who
+        do follow you look like non-mutuals.
+        """
+        if not self.max_snapshot_age:
+            return None
+        return self.store.latest(self.username, kind, max_age=self.max_snapshot_age, verified_only=True)
+    
+    def can_load_quickly(self, kind):
+        """True if a list can come from a fresh snapshot or an incremental refresh"""
+        if self.fresh_snapshot(kind):
+            return True
+        return self.incremental and self.can_refresh(self.store.latest(self.username, kind))
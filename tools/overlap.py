@@ -0,0 +1,95 @@
+import csv
+import json
+from itertools import combinations
+
+from usertable import UserTable, popcount
+
+# Result sets of one pair of accounts, in export order
+OVERLAP_SETS = ("shared", "only_a", "only_b")
+
+
+class AudienceOverlap:
+    """Pairwise overlap between the same list (usually followers) of several accounts
+
+    Every list is interned into one UserTable and held as a bitmap, so each
+    pair costs a few big-integer operations whatever the list sizes, and a
+    username shared by several lists is stored once.
+    """
+
+    def __init__(self, lists, kind="followers"):
+        self.kind = kind
+        self.users = UserTable()
+        # account -> bitmap, in the order given
+        self.bitmaps = {account.lower(): self.users.bitmap(usernames) for account, usernames in lists.items()}
+
+    def pair(self, a, b):
+        """Metrics for two accounts, as a dict"""
+        first, second = self.bitmaps[a], self.bitmaps[b]
+        shared = popcount(first & second)
+        union = popcount(first | second)
+        a_size, b_size = popcount(first), popcount(second)
+        return {
+            "a": a,
+            "b": b,
+            "a_size": a_size,
+            "b_size": b_size,
+            "shared": shared,
+            "only_a": a_size - shared,
+            "only_b": b_size - shared,
+            "jaccard": round(shared / union, 4) if union else 0.0,
+            # Share of each account's list that's also in the other's
+            "a_in_b": round(shared / a_size, 4) if a_size else 0.0,
+            "b_in_a": round(shared / b_size, 4) if b_size else 0.0,
+        }
+
+    def pairs(self):
+        """Metrics for every pair of accounts"""
+        return [self.pair(a, b) for a, b in combinations(self.bitmaps, 2)]
+
+    def sets(self, a, b):
+        """The usernames behind a pair's numbers: {"shared": [...], "only_a": [...], "only_b": [...]}"""
+        first, second = self.bitmaps[a], self.bitmaps[b]
+        bitmaps = {"shared": first & second, "only_a": first & ~second, "only_b": second & ~first}
+        return {name: sorted(self.users.usernames(bitmap)) for name, bitmap in bitmaps.items()}
+
+
+def export_overlap(overlap, path):
+    """Write every pair's metrics and result sets to .json or .csv (by extension)
+
+    CSV gets one row per username per set: a, b, set, username. Returns the
+    number of usernames written.
+    """
+    written = 0
+    if path.lower().endswith(".json"):
+        pairs = []
+        for metrics in overlap.pairs():
+            sets = overlap.sets(metrics["a"], metrics["b"])
+            written += sum(len(usernames) for usernames in sets.values())
+            pairs.append(dict(metrics, **sets))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"kind": overlap.kind, "pairs": pairs}, f, indent=2)
+        return written
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["a", "b", "set", "username"])
+        for a, b in combinations(overlap.bitmaps, 2):
+            for name, usernames in overlap.sets(a, b).items():
+                writer.writerows((a, b, name, username) for username in usernames)
+                written += len(usernames)
+    return written
+
+
+def print_overlap(overlap, pairs):
+    print("\n" + "="*60)
+    print(f"AUDIENCE OVERLAP - {overlap.kind}")
+    print("="*60)
+    for metrics in pairs:
+        a, b = metrics["a"], metrics["b"]
+        print(f"@{a} ({metrics['a_size']}) vs @{b} ({metrics['b_size']})")
+        print(f"  🤝 Shared: {metrics['shared']}  "
+              f"({metrics['a_in_b']:.1%} of @{a}, {metrics['b_in_a']:.1%} of @{b})")
+        print(f"  ➡️  Only @{a}: {metrics['only_a']}")
+        print(f"  ⬅️  Only @{b}: {metrics['only_b']}")
+        print(f"  📐 Jaccard similarity: {metrics['jaccard']:.3f}")
+    print("="*60)
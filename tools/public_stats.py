@@ -0,0 +1,75 @@
+import time
+
+from analytics import list_stats
+from backends import SITE_URL, HttpBackend
+from events import EventLog
+from lists import ListLoader
+from snapshots import SnapshotStore
+
+
+class PublicStats:
+    """Statistics for any accounts from their public lists, without logging in
+
+    Following/followers pages are public, so nothing here needs credentials
+    or a browser. One pooled HTTP session (behind the shared rate limiter)
+    and one snapshot store serve every account, so checking a portfolio of
+    accounts costs one connection pool and reuses whatever was crawled
+    recently instead of paying for a login per account.
+    """
+
+    def __init__(self, max_snapshot_age=3600, concurrency=4, backend=None, store=None, site_url=SITE_URL,
+                 incremental=True):
+        self.max_snapshot_age = max_snapshot_age
+        # False crawls every list in full, e.g. so a recording holds every page
+        self.incremental = incremental
+        self.concurrency = concurrency
+        self.site_url = site_url
+        self.store = store if store is not None else SnapshotStore()
+        self.events = EventLog(self.store.path)
+        # Opened last, so a failure above doesn't leave a session behind
+        self.backend = backend or HttpBackend()
+
+    def reader(self, username):
+        """List loader for one account that shares this session and store"""
+        return ListLoader(
+            username, backend=self.backend, store=self.store,
+            max_snapshot_age=self.max_snapshot_age, concurrency=self.concurrency, site_url=self.site_url,
+            events=self.events, incremental=self.incremental,
+        )
+
+    def account(self, username, loader=None):
+        """Stats dict for one account
+
+        `loader(reader)` can replace the default get_following_and_followers,
+        e.g. to show live counts during a full crawl.
+        """
+        started = time.perf_counter()
+        reader = self.reader(username)
+        # Only saved lists served as they are count as cached; an incremental
+        # refresh still crawls
+        cached = reader.fresh_snapshot("following") and reader.fresh_snapshot("followers")
+        following, followers = (loader or ListLoader.get_following_and_followers)(reader)
+
+        stats = list_stats(username, following, followers)
+        stats["source"] = "cache" if cached else "crawl"
+        stats["elapsed_s"] = round(time.perf_counter() - started, 3)
+        return stats
+
+    def load_list(self, username, kind="followers"):
+        """One account's following or followers list, from the cache when it's fresh enough"""
+        return self.reader(username).load_list(kind)
+
+    def accounts(self, usernames, loader=None):
+        """Yield a stats dict per account; a failed account gets an "error" entry instead"""
+        for username in usernames:
+            try:
+                yield self.account(username, loader)
+            except Exception as e:
+                yield {"account": username.lower(), "error": str(e)[:200]}
+
+    def close(self):
+        try:
+            self.backend.close()
+        finally:
+            self.store.close()
+            self.events.close()
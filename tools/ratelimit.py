@@ -0,0 +1,189 @@
+import random
+import re
+import threading
+import time
+
+from tracing import tracer
+
+DEFAULT_RATE = 2.0
+
+# Responses that mean "slow down" rather than "this page is broken"
+THROTTLE_STATUSES = {429, 503}
+
+# Page titles of rate-limit, block and challenge pages (lowercase). A title
+# matches when it is one of these, give or take a status code in front
+# ("429 Too Many Requests") and a trailing "...", "| site" or "• site",
+# so a film or list that merely mentions "rate limit" isn't mistaken for
+# an error page.
+THROTTLE_TITLES = (
+    "too many requests",
+    "rate limit",
+    "rate limited",
+    "you are being rate limited",
+    "access denied",
+    "temporarily unavailable",
+    "service temporarily unavailable",
+    "service unavailable",
+    "just a moment",
+)
+
+TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+THROTTLE_TITLE = re.compile(
+    r"(?:(?:error\s+)?\d{3,4}\s*[-:|]?\s*)?(?:%s)\s*(?:$|\.\.\.|\u2026|\||\u2022)"
+    % "|".join(re.escape(marker) for marker in sorted(THROTTLE_TITLES, key=len, reverse=True))
+)
+
+
+def is_throttle_title(title):
+    """True if a page title is a known rate-limit/error page title"""
+    title = " ".join((title or "").lower().split())
+    return bool(THROTTLE_TITLE.match(title))
+
+
+def is_throttle_response(status, html=""):
+    """True if an HTTP response is a throttling response (status or error page)"""
+    if status in THROTTLE_STATUSES:
+        return True
+    match = TITLE.search(html[:4096]) if html else None
+    return bool(match) and is_throttle_title(match.group(1))
+
+
+def retry_after_seconds(value):
+    """Parse a Retry-After header given in seconds, None if absent or a date"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Thread-safe token bucket that slows itself down when throttled
+
+    Every request (HTTP fetch, browser navigation, follow/unfollow click)
+    calls acquire() first. Normally that spaces requests evenly at `rate`
+    per second (0 means unlimited). When a throttling response is seen
+    (throttled()) or `failure_threshold` actions fail in a row (failure()),
+    the effective rate is halved and everyone waits out an exponentially
+    growing, jittered pause. After `recover_after` successes in a row the
+    rate creeps back up by 20% until it reaches `rate` again.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=1, min_rate=0.05, base_pause=5.0, max_pause=300.0,
+                 failure_threshold=3, recover_after=20):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.base_pause = base_pause
+        self.max_pause = max_pause
+        self.failure_threshold = failure_threshold
+        self.recover_after = recover_after
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget any backoff and go back to the configured rate"""
+        with self._lock:
+            self.effective_rate = self.rate
+            self.strikes = 0
+            self.throttled_at = None
+            self._tokens = float(self.burst)
+            self._refilled = time.monotonic()
+            self._failures = 0
+            self._successes = 0
+
+    @property
+    def interval(self):
+        return 1.0 / self.effective_rate if self.effective_rate > 0 else 0.0
+
+    @property
+    def backing_off(self):
+        return self.strikes > 0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.effective_rate)
+        self._refilled = now
+
+    def acquire(self):
+        """Block until a token is available for this caller"""
+        with self._lock:
+            if self.effective_rate <= 0:
+                return
+            now = time.monotonic()
+            self._refill(now)
+            # Tokens may go negative: each waiter reserves the next one, so
+            # concurrent callers queue up evenly spaced
+            self._tokens -= 1
+            wait = -self._tokens / self.effective_rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def throttled(self, reason, retry_after=None):
+        """Back off after a throttling response; returns the pause in seconds"""
+        with self._lock:
+            now = time.monotonic()
+            # Unlimited crawls need a finite rate to halve from
+            current = self.effective_rate if self.effective_rate > 0 else 10.0
+            self._refill(now)
+            self.effective_rate = max(self.min_rate, current / 2)
+            self.strikes += 1
+            self.throttled_at = time.time()
+            self._failures = 0
+            self._successes = 0
+
+            pause = min(self.max_pause, self.base_pause * 2 ** (self.strikes - 1))
+            pause *= random.uniform(0.5, 1.5)
+            if retry_after is not None:
+                pause = max(pause, retry_after)
+            # Express the pause as token debt so waiters resume one at a time
+            self._tokens = min(self._tokens, 0.0) - pause * self.effective_rate
+            rate = self.effective_rate
+
+        tracer.count("throttle.backoff")
+        print(f"\n⚠️  Throttled ({reason}) - pausing {pause:.0f}s, then {rate:.2f} requests/second")
+        return pause
+
+    def failure(self):
+        """Record a failed action; a run of them counts as being throttled"""
+        with self._lock:
+            self._failures += 1
+            self._successes = 0
+            failures = self._failures
+        if failures >= self.failure_threshold:
+            self.throttled(f"{failures} failures in a row")
+
+    def success(self):
+        """Record a successful action and slowly win back any lost rate"""
+        with self._lock:
+            self._failures = 0
+            if not self.strikes:
+                return
+            self._successes += 1
+            if self._successes < self.recover_after:
+                return
+            self._successes = 0
+            self._refill(time.monotonic())
+            self.effective_rate *= 1.2
+            target = self.rate if self.rate > 0 else 10.0
+            if self.effective_rate >= target:
+                self.effective_rate = self.rate
+                self.strikes = 0
+            else:
+                # Stay flagged as backing off until fully recovered
+                self.strikes = max(1, self.strikes - 1)
+
+    def describe(self):
+        """One line on the rate currently in force"""
+        if self.effective_rate <= 0:
+            current = "unlimited"
+        else:
+            current = f"{self.effective_rate:.2f} requests/second"
+        if not self.backing_off:
+            return f"{current} (normal)"
+        since = time.strftime("%H:%M:%S", time.localtime(self.throttled_at))
+        return f"{current} (slowed down after throttling at {since}, recovering)"
+
+
+# Process-wide limiter shared by the HTTP backend, the browser and the tools'
+# actions, so a throttling response anywhere slows everything down
+limiter = RateLimiter()
@@ -0,0 +1,126 @@
+import json
+import os
+import time
+
+import requests
+
+from backends import SITE_URL, USER_AGENT
+from tracing import tracer
+
+DEFAULT_SESSION_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".sessions"
+)
+
+# Redirects to the sign-in page unless the request carries a logged-in session
+CHECK_PATH = "/settings/"
+
+
+class SessionStore:
+    """Saves authenticated cookie jars per account between runs"""
+
+    def __init__(self, directory=DEFAULT_SESSION_DIR):
+        self.directory = directory
+
+    def path(self, account):
+        return os.path.join(self.directory, f"{account.lower()}.json")
+
+    def has(self, account):
+        return os.path.exists(self.path(account))
+
+    def load(self, account):
+        """Saved cookies for an account, or None"""
+        try:
+            with open(self.path(account), encoding="utf-8") as f:
+                return json.load(f)["cookies"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, account, cookies):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(account)
+        # The cookies are as good as a password: create the file owner-only
+        # rather than tightening it after they're written
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "cookies": cookies}, f)
+
+    def clear(self, account):
+        try:
+            os.remove(self.path(account))
+        except OSError:
+            pass
+
+
+def apply_to_http(session, cookies):
+    """Load Selenium-style cookie dicts into a requests session"""
+    for cookie in cookies:
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain"),
+            path=cookie.get("path", "/"),
+        )
+
+
+def apply_to_driver(driver, cookies, site_url=SITE_URL):
+    """Load saved cookies into a WebDriver (it has to be on the site first)"""
+    driver.get(f"{site_url}/")
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+        except Exception:
+            # Cookies for other domains/paths can't be set from here
+            pass
+
+
+def is_valid(cookies, site_url=SITE_URL, timeout=10):
+    """Check saved cookies with one request to a logged-in only page"""
+    if not cookies:
+        return False
+
+    with requests.Session() as session:
+        session.headers.update({"User-Agent": USER_AGENT})
+        apply_to_http(session, cookies)
+        try:
+            response = session.get(f"{site_url}{CHECK_PATH}", allow_redirects=False, timeout=timeout)
+        except requests.RequestException:
+            return False
+    return response.status_code == 200
+
+
+def restore_or_login(tool, sessions):
+    """Reuse a tool's saved session if still valid, otherwise log in and save it
+
+    tool is a LetterboxdUnfollower/LetterboxdFollowBot with a running driver.
+    """
+    cookies = sessions.load(tool.username)
+    with tracer.span("session.check"):
+        valid = is_valid(cookies, tool.site_url)
+    if valid:
+        apply_to_driver(tool.driver, cookies, tool.site_url)
+        share_with_backend(tool, cookies)
+        print("Restored saved session")
+        return True
+
+    if cookies:
+        print("Saved session expired, logging in again...")
+        sessions.clear(tool.username)
+
+    if not tool.password:
+        print("No password given and no valid saved session")
+        return False
+
+    if not tool.login():
+        return False
+
+    cookies = tool.driver.get_cookies()
+    sessions.save(tool.username, cookies)
+    share_with_backend(tool, cookies)
+    return True
+
+
+def share_with_backend(tool, cookies):
+    """Give the tool's HTTP backend (if any) the same logged-in cookies"""
+    http_session = getattr(getattr(tool, "backend", None), "session", None)
+    if http_session is not None:
+        apply_to_http(http_session, cookies)
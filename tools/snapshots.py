@@ -0,0 +1,326 @@
+import os
+import sqlite3
+import threading
+import time
+
+from extractor import RECORD_FIELDS, UserRecord
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "letterboxd_aio.db"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    account TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    crawled_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    full INTEGER NOT NULL DEFAULT 1,
+    verified INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_lookup
+    ON snapshots (account, kind, crawled_at);
+
+CREATE TABLE IF NOT EXISTS snapshot_members (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    username TEXT NOT NULL,
+    position INTEGER,
+    PRIMARY KEY (snapshot_id, username)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_snapshot_members_username
+    ON snapshot_members (username);
+
+CREATE TABLE IF NOT EXISTS user_records (
+    username TEXT PRIMARY KEY,
+    display_name TEXT,
+    followers INTEGER,
+    following INTEGER,
+    watched INTEGER,
+    lists INTEGER,
+    likes INTEGER,
+    seen_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+KINDS = ("following", "followers")
+
+# Columns added after the first release, created on older databases at open
+MIGRATIONS = (
+    ("snapshots", "full", "INTEGER NOT NULL DEFAULT 1"),
+    ("snapshot_members", "position", "INTEGER"),
+    ("snapshots", "verified", "INTEGER NOT NULL DEFAULT 1"),
+)
+
+SNAPSHOT_COLUMNS = "id, account, kind, crawled_at, size, full, verified"
+RECORD_COLUMNS = ", ".join(RECORD_FIELDS)
+
+# Usernames per IN (...) query, well under SQLite's bound parameter limit
+LOOKUP_CHUNK = 500
+
+
+def format_age(seconds):
+    """Human readable age, e.g. '42s', '5m', '3h', '2d'"""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit}"
+    return f"{int(seconds)}s"
+
+
+def merge_refresh(previous, fetched, last_page, complete):
+    """Merge an incremental crawl into the previous ordered list
+
+    Lists are newest first, so when the crawl stopped early at a fully known
+    page everything after that page's furthest known user is carried over
+    from the previous list. Returns (users, added, removed); removals in the
+    carried-over tail are only picked up by the next full sync.
+    """
+    fetched_set = set(fetched)
+    previous_set = set(previous)
+
+    if complete:
+        users = list(fetched)
+    else:
+        positions = {username: i for i, username in enumerate(previous)}
+        boundary = max(positions[username] for username in last_page if username in positions)
+        users = list(fetched) + [u for u in previous[boundary + 1:] if u not in fetched_set]
+
+    added = fetched_set - previous_set
+    removed = previous_set - set(users)
+    return users, added, removed
+
+
+class Snapshot:
+    """One stored crawl of an account's following or followers list"""
+
+    def __init__(self, store, id, account, kind, crawled_at, size, full=True, verified=True):
+        self.store = store
+        self.id = id
+        self.account = account
+        self.kind = kind
+        self.crawled_at = crawled_at
+        self.size = size
+        # False when the snapshot came from an incremental refresh
+        self.full = bool(full)
+        # False when the crawl came out short of the profile's count
+        self.verified = bool(verified)
+
+    @property
+    def age(self):
+        return time.time() - self.crawled_at
+
+    def users(self):
+        return self.store.load(self.id)
+
+    def ordered_users(self):
+        """Usernames in list order (newest relationship first)"""
+        return self.store.load_ordered(self.id)
+
+    def __contains__(self, username):
+        return self.store.contains(self.id, username)
+
+
+class SnapshotStore:
+    """SQLite store of follower/following snapshots keyed by account, list and time"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        for table, column, definition in MIGRATIONS:
+            columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        self.conn.commit()
+
+    def _snapshot(self, row):
+        return Snapshot(self, *row) if row else None
+
+    def save(self, account, kind, usernames, crawled_at=None, full=True, verified=True):
+        """Store a crawl and return its Snapshot
+
+        Pass usernames as a list to keep list order, which incremental
+        refreshes rely on; sets are stored without positions. full=False
+        marks an incremental refresh, verified=False a crawl that came out
+        short of the profile count.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown list type: {kind}")
+
+        account = account.lower()
+        crawled_at = crawled_at or time.time()
+        if isinstance(usernames, (set, frozenset)):
+            members = [(username, None) for username in usernames]
+        else:
+            members = [(username, position) for position, username in enumerate(dict.fromkeys(usernames))]
+
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO snapshots (account, kind, crawled_at, size, full, verified) VALUES (?, ?, ?, ?, ?, ?)",
+                (account, kind, crawled_at, len(members), int(full), int(verified)),
+            )
+            snapshot_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO snapshot_members (snapshot_id, username, position) VALUES (?, ?, ?)",
+                ((snapshot_id, username, position) for username, position in members),
+            )
+
+        return Snapshot(self, snapshot_id, account, kind, crawled_at, len(members), full, verified)
+
+    def latest(self, account, kind, max_age=None, full_only=False, verified_only=False):
+        """Most recent snapshot, or None if there isn't one younger than max_age seconds
+
+        full_only skips incremental refreshes, verified_only crawls that
+        came out short.
+        """
+        query = f"SELECT {SNAPSHOT_COLUMNS} FROM snapshots WHERE account = ? AND kind = ?"
+        params = [account.lower(), kind]
+        if max_age is not None:
+            query += " AND crawled_at >= ?"
+            params.append(time.time() - max_age)
+        if full_only:
+            query += " AND full = 1"
+        if verified_only:
+            query += " AND verified = 1"
+        query += " ORDER BY crawled_at DESC LIMIT 1"
+
+        with self._lock:
+            row = self.conn.execute(query, params).fetchone()
+        return self._snapshot(row)
+
+    def history(self, account, kind):
+        """All snapshots for an account's list, oldest first"""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {SNAPSHOT_COLUMNS} FROM snapshots"
+                " WHERE account = ? AND kind = ? ORDER BY crawled_at",
+                (account.lower(), kind),
+            ).fetchall()
+        return [self._snapshot(row) for row in rows]
+
+    def at(self, account, kind, timestamp, verified_only=False):
+        """Latest snapshot crawled at or before timestamp, else the earliest one"""
+        verified = " AND verified = 1" if verified_only else ""
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {SNAPSHOT_COLUMNS} FROM snapshots WHERE account = ? AND kind = ?{verified}"
+                " ORDER BY crawled_at > ?, CASE WHEN crawled_at > ? THEN crawled_at ELSE -crawled_at END"
+                " LIMIT 1",
+                (account.lower(), kind, timestamp, timestamp),
+            ).fetchone()
+        return self._snapshot(row)
+
+    def accounts(self):
+        """Accounts that have at least one snapshot"""
+        with self._lock:
+            rows = self.conn.execute("SELECT DISTINCT account FROM snapshots ORDER BY account").fetchall()
+        return [row[0] for row in rows]
+
+    def load(self, snapshot_id):
+        """All usernames in a snapshot"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT username FROM snapshot_members WHERE snapshot_id = ?", (snapshot_id,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def load_list(self, snapshot_id):
+        """All usernames in a snapshot as a list in storage order - the quickest bulk load"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT group_concat(username, char(10)) FROM snapshot_members WHERE snapshot_id = ?",
+                (snapshot_id,),
+            ).fetchone()
+        return row[0].split("\n") if row[0] else []
+
+    def load_ordered(self, snapshot_id):
+        """Usernames in a snapshot in list order, unordered members last"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT username FROM snapshot_members WHERE snapshot_id = ?"
+                " ORDER BY position IS NULL, position",
+                (snapshot_id,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def is_ordered(self, snapshot_id):
+        """True if every member of the snapshot has a list position"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM snapshot_members WHERE snapshot_id = ? AND position IS NULL LIMIT 1",
+                (snapshot_id,),
+            ).fetchone()
+        return row is None
+
+    def overlap_count(self, snapshot_id, other_id):
+        """Number of usernames in both snapshots, counted in SQLite"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) FROM snapshot_members a JOIN snapshot_members b"
+                " ON b.snapshot_id = ? AND b.username = a.username"
+                " WHERE a.snapshot_id = ?",
+                (other_id, snapshot_id),
+            ).fetchone()
+        return row[0]
+
+    def difference(self, snapshot_id, other_id):
+        """Usernames in the first snapshot but not the second, in list order"""
+        return [username for username, _ in self.positioned_difference(snapshot_id, other_id)]
+
+    def positioned_difference(self, snapshot_id, other_id):
+        """Like difference, as (username, position) pairs with each user's
+        0-based position in the first snapshot (None if it was saved as a set)
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT a.username, a.position FROM snapshot_members a WHERE a.snapshot_id = ?"
+                " AND NOT EXISTS (SELECT 1 FROM snapshot_members b"
+                "                 WHERE b.snapshot_id = ? AND b.username = a.username)"
+                " ORDER BY a.position IS NULL, a.position",
+                (snapshot_id, other_id),
+            ).fetchall()
+        return rows
+
+    def contains(self, snapshot_id, username):
+        """Indexed membership check for a single user"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM snapshot_members WHERE snapshot_id = ? AND username = ?",
+                (snapshot_id, username),
+            ).fetchone()
+        return row is not None
+
+    def save_records(self, records, seen_at=None):
+        """Store the latest row metadata seen for each user, replacing older rows"""
+        seen_at = seen_at or time.time()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO user_records ({RECORD_COLUMNS}, seen_at)"
+                f" VALUES ({', '.join('?' * len(RECORD_FIELDS))}, ?)",
+                ((*(getattr(record, field) for field in RECORD_FIELDS), seen_at) for record in records),
+            )
+
+    def records(self, usernames):
+        """Stored UserRecords for usernames, as {username: record}; unknown users are left out"""
+        usernames = list(usernames)
+        records = {}
+        with self._lock:
+            for start in range(0, len(usernames), LOOKUP_CHUNK):
+                chunk = usernames[start:start + LOOKUP_CHUNK]
+                rows = self.conn.execute(
+                    f"SELECT {RECORD_COLUMNS} FROM user_records"
+                    f" WHERE username IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for row in rows:
+                    records[row[0]] = UserRecord(*row)
+        return records
+
+    def close(self):
+        self.conn.close()
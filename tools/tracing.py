@@ -0,0 +1,162 @@
+import csv
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_REPORT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "reports"
+)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Span:
+    """Handle for one timed operation; call fail() if it didn't work"""
+
+    def __init__(self, name):
+        self.name = name
+        self.failed = False
+
+    def fail(self):
+        self.failed = True
+
+
+class Tracer:
+    """Collects per-phase durations, counts and failures for a run
+
+    Use the process-wide `tracer` instance:
+
+        with tracer.span("page.navigate"):
+            driver.get(url)
+
+    and call finish() at the end of a run to print a p50/p95 summary and
+    write JSON/CSV reports.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.durations = {}
+            self.failures = {}
+            self.counters = {}
+
+    def record(self, name, seconds, failed=False):
+        with self._lock:
+            self.durations.setdefault(name, []).append(seconds)
+            if failed:
+                self.failures[name] = self.failures.get(name, 0) + 1
+
+    def count(self, name, amount=1):
+        """Bump a plain counter (things that aren't timed, e.g. users found)"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def span(self, name):
+        span = Span(name)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.fail()
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started, span.failed)
+
+    def rows(self):
+        """One summary dict per span name, slowest total first"""
+        with self._lock:
+            durations = {name: list(values) for name, values in self.durations.items()}
+            failures = dict(self.failures)
+
+        rows = []
+        for name, values in durations.items():
+            rows.append({
+                "span": name,
+                "count": len(values),
+                "failures": failures.get(name, 0),
+                "total_s": round(sum(values), 4),
+                "mean_s": round(sum(values) / len(values), 4),
+                "p50_s": round(percentile(values, 50), 4),
+                "p95_s": round(percentile(values, 95), 4),
+                "max_s": round(max(values), 4),
+            })
+        rows.sort(key=lambda row: row["total_s"], reverse=True)
+        return rows
+
+    def summary(self):
+        """Print a short per-span table"""
+        rows = self.rows()
+        if not rows:
+            return
+
+        print("\n" + "="*72)
+        print("TIMINGS")
+        print("="*72)
+        print(f"{'span':<24}{'count':>7}{'fail':>6}{'total':>10}{'p50':>9}{'p95':>9}")
+        for row in rows:
+            print(
+                f"{row['span']:<24}{row['count']:>7}{row['failures']:>6}"
+                f"{row['total_s']:>9.2f}s{row['p50_s']:>8.2f}s{row['p95_s']:>8.2f}s"
+            )
+        with self._lock:
+            counters = dict(self.counters)
+        if counters:
+            print("-"*72)
+            print("  ".join(f"{name}: {value}" for name, value in sorted(counters.items())))
+        print("="*72)
+
+    def write_report(self, run_name, directory=DEFAULT_REPORT_DIR):
+        """Write <run_name>-<timestamp>.json and .csv, returns the JSON path"""
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        base = os.path.join(directory, f"{run_name}-{stamp}")
+        rows = self.rows()
+
+        with self._lock:
+            report = {
+                "run": run_name,
+                "started_at": self.started,
+                "duration_s": round(time.time() - self.started, 3),
+                "spans": rows,
+                "counters": dict(self.counters),
+                "raw": {name: [round(v, 4) for v in values] for name, values in self.durations.items()},
+            }
+
+        with open(f"{base}.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        with open(f"{base}.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(
+                f, fieldnames=["span", "count", "failures", "total_s", "mean_s", "p50_s", "p95_s", "max_s"]
+            )
+            writer.writeheader()
+            writer.writerows(rows)
+
+        return f"{base}.json"
+
+    def finish(self, run_name):
+        """Print the summary and write the reports for this run"""
+        self.summary()
+        try:
+            path = self.write_report(run_name)
+            print(f"Run report: {path}")
+        except OSError as e:
+            print(f"Could not write run report: {e}")
+
+
+tracer = Tracer()
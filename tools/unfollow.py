@@ -1,29 +1,91 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import time
 
-class LetterboxdUnfollower:
-    def __init__(self, username, password):
-        self.username = username
+from backends import SITE_URL
+from crawler import page_url
+from driver import DriverLost, DriverStats, DriverSupervisor, create_driver
+from extractor import extract_usernames
+from journal import RunJournal, find_resumable
+from lists import ListLoader
+from session import SessionStore, restore_or_login
+from snapshots import format_age
+from tracing import tracer
+from waits import (
+    FIND_ROW_JS,
+    PageWaiter,
+    follow_button_ready,
+    list_page_ready,
+    login_complete,
+    row_unfollowed,
+)
+
+# unfollow_from_list result when the row shows you already don't follow them
+ALREADY_UNFOLLOWED = "already"
+
+# Clicks the 'following' button in a user's row on a following list page.
+# Returns "clicked", "not-following" if the row shows you don't follow them,
+# or null if they aren't on this page.
+CLICK_ROW_FOLLOWING_SCRIPT = FIND_ROW_JS + """
+var row = findRow(arguments[0]);
+if (!row) { return null; }
+var button = row.querySelector('.js-button-following');
+if (!button || button.offsetParent === null) { return 'not-following'; }
+button.click();
+return 'clicked';
+"""
+
+class LetterboxdUnfollower(ListLoader):
+    def __init__(self, username, password, backend=None, wait_timeout=10, min_page_delay=0.5,
+                 lean=False, manager=None, store=None, max_snapshot_age=None, incremental=True, full_sync_interval=7 * 86400,
+                 concurrency=4, site_url=SITE_URL, unfollow_mode="list", pause_on_exit=True, events=None,
+                 recycle_after=400, max_browser_mb=1500):
+        super().__init__(
+            username, backend=backend, store=store, events=events, max_snapshot_age=max_snapshot_age,
+            incremental=incremental, full_sync_interval=full_sync_interval, concurrency=concurrency,
+            site_url=site_url,
+        )
         self.password = password
         self.driver = None
-        self.following = set()
-        self.followers = set()
+        self.sessions = SessionStore()
+        self.waiter = None
+        # Lean mode: headless, eager page loads, images/fonts/third-party scripts blocked
+        self.lean = lean
+        self.driver_stats = None
+        # Shared DriverManager from the menu; when set the browser outlives this tool
+        self.manager = manager
+        # Restarts the browser during long runs before it slows down or dies
+        self.supervisor = DriverSupervisor(self, max_navigations=recycle_after, max_rss_mb=max_browser_mb)
+        self.wait_timeout = wait_timeout
+        self.min_page_delay = min_page_delay
+        # "list" unfollows from your following list pages (no profile visits),
+        # "profile" opens each user's profile
+        self.unfollow_mode = unfollow_mode
+        # RunJournal for the current run, so it can be resumed after a crash
+        self.journal = None
+        # False for unattended runs (cron, the CLI): never wait for Enter
+        self.pause_on_exit = pause_on_exit
+        # Totals of the last unfollow pass, returned by run()
+        self.summary = None
         
     def setup_driver(self):
         """Initialize Chrome driver with options"""
-        options = webdriver.ChromeOptions()
-        options.add_argument('--start-maximized')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        self.driver = webdriver.Chrome(options=options)
+        with tracer.span("driver.startup"):
+            if self.manager:
+                self.driver = self.manager.get(lean=self.lean)
+            else:
+                self.driver = create_driver(lean=self.lean)
+        self.driver_stats = DriverStats(self.driver, lean=self.lean)
+        self.waiter = PageWaiter(
+            self.driver, timeout=self.wait_timeout, min_delay=self.min_page_delay, stats=self.driver_stats
+        )
         
     def login(self):
         """Login to Letterboxd"""
         print("Logging in...")
-        self.driver.get("https://letterboxd.com/sign-in/")
+        self.waiter.get(f"{self.site_url}/sign-in/")
         
         try:
             # Wait for and fill login form
@@ -58,8 +120,8 @@ class LetterboxdUnfollower:
             else:
                 submit_btn.click()
             
-            # Wait for login to complete
-            time.sleep(3)
+            # Wait for the site to navigate away from the form (or show an error)
+            self.waiter.wait_for(login_complete)
             
             # Check if login was successful by looking for profile link
             if self.username.lower() in self.driver.current_url.lower():
@@ -79,145 +141,200 @@ class LetterboxdUnfollower:
             print(f"Login failed: {e}")
             return False
     
-    def get_all_users_from_page(self):
-        """Extract all usernames from the current page using multiple methods"""
-        usernames = set()
+    def ensure_logged_in(self):
+        """Reuse the saved session when it's still valid, otherwise log in"""
+        if self.manager:
+            if self.manager.logged_in_as == self.username.lower():
+                return True
+            # The warm browser may still hold another account's cookies
+            self.driver.delete_all_cookies()
         
-        # Method 1: Extract from person-summary divs with avatar links
-        try:
-            person_divs = self.driver.find_elements(By.CSS_SELECTOR, "div.person-summary")
-            for person in person_divs:
-                try:
-                    avatar_link = person.find_element(By.CSS_SELECTOR, "a.avatar")
-                    href = avatar_link.get_attribute("href")
-                    if href:
-                        username = href.strip("/").split("/")[-1]
-                        if username and username != "":
-                            usernames.add(username)
-                except:
-                    pass
-        except:
-            pass
+        with tracer.span("login") as span:
+            if not restore_or_login(self, self.sessions):
+                span.fail()
+                return False
+        
+        if self.manager:
+            self.manager.logged_in_as = self.username.lower()
+        return True
+    
+    def close_driver(self):
+        """Report browser stats and quit, unless the browser is shared"""
+        if self.driver_stats:
+            self.driver_stats.report()
+        if self.manager:
+            if self.pause_on_exit:
+                input("\nPress Enter to return to the menu...")
+        elif self.driver:
+            if self.pause_on_exit:
+                input("\nPress Enter to close browser...")
+            self.driver.quit()
+    
+    def get_all_users_from_page(self):
+        """Extract all usernames from the current page in a single round trip"""
+        return extract_usernames(self.driver)
+    
+    def unfollow_from_profile(self, user):
+        """Unfollow a user from their profile page, returns True if the button was clicked"""
+        # Go to user's profile and wait for the follow button to attach
+        self.waiter.get(f"{self.site_url}/{user}/", follow_button_ready)
         
-        # Method 2: Extract from table rows with name links
+        # Find the unfollow button - use the correct selector
         try:
-            name_links = self.driver.find_elements(By.CSS_SELECTOR, "a.name")
-            for link in name_links:
-                href = link.get_attribute("href")
-                if href:
-                    username = href.strip("/").split("/")[-1]
-                    if username and username != "":
-                        usernames.add(username)
-        except:
-            pass
+            unfollow_btn = WebDriverWait(self.driver, 5).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, "a.js-button-following"))
+            )
+        except TimeoutException:
+            return False
         
-        return usernames
+        self.waiter.limiter.acquire()
+        unfollow_btn.click()
+        return True
     
-    def load_all_pages_by_url(self, base_url):
-        """Load all pages by directly navigating to page URLs"""
-        all_users = set()
-        page = 1
+    def attempt_unfollow(self, user):
+        """Unfollow one user from their list page when possible, else from their profile
         
-        while True:
-            url = f"{base_url}page/{page}/" if page > 1 else base_url
-            print(f"Loading page {page}...")
-            self.driver.get(url)
-            time.sleep(2)
-            
-            # Get users from this page
-            page_users = self.get_all_users_from_page()
-            
-            if not page_users:
-                # No users found, we've reached the end
-                break
-            
-            all_users.update(page_users)
-            print(f"  Found {len(page_users)} users on page {page} (Total: {len(all_users)})")
-            
-            # Check if there's a next page link
+        If that fails and the supervisor finds the browser gone or worn out,
+        it's restarted and the user is tried once more.
+        """
+        for attempt in range(2):
+            unfollowed = None
+            error = None
             try:
-                next_link = self.driver.find_element(By.CSS_SELECTOR, "a.next")
-                page += 1
-            except NoSuchElementException:
-                # No next page, we're done
+                if self.unfollow_mode == "list" and user in self.following_pages:
+                    unfollowed = self.unfollow_from_list(user)
+                if unfollowed is None:
+                    unfollowed = self.unfollow_from_profile(user)
+            except Exception as e:
+                error = e
+            if (unfollowed and error is None) or attempt or not self.supervisor.check(failed=True):
                 break
-        
-        return all_users
+        if error is not None:
+            raise error
+        return unfollowed
     
-    def get_following(self):
-        """Get list of users you follow"""
-        print("\n" + "="*50)
-        print("Getting following list...")
-        print("="*50)
+    def unfollow_from_list(self, user):
+        """Unfollow a user from the following list page they were seen on
         
-        base_url = f"https://letterboxd.com/{self.username}/following/"
-        self.following = self.load_all_pages_by_url(base_url)
-        
-        print(f"\nTotal following: {len(self.following)} users")
-        return self.following
-    
-    def get_followers(self):
-        """Get list of users who follow you"""
-        print("\n" + "="*50)
-        print("Getting followers list...")
-        print("="*50)
+        Only navigates if that page isn't already loaded, and confirms the
+        unfollow from the row's button state. Returns None if the user isn't
+        on the page or either neighbour (earlier unfollows shift the list
+        back, new follows push it forward), so the caller can fall back to
+        their profile.
+        """
+        base_url = f"{self.site_url}/{self.username}/following/"
+        page = self.following_pages[user]
         
-        base_url = f"https://letterboxd.com/{self.username}/followers/"
-        self.followers = self.load_all_pages_by_url(base_url)
+        for candidate in (page, page - 1, page + 1):
+            if candidate < 1:
+                continue
+            url = page_url(base_url, candidate)
+            if self.driver.current_url.rstrip("/") != url.rstrip("/"):
+                self.waiter.get(url, list_page_ready)
+            
+            self.waiter.limiter.acquire()
+            result = self.driver.execute_script(CLICK_ROW_FOLLOWING_SCRIPT, user)
+            if result == "not-following":
+                return ALREADY_UNFOLLOWED
+            if result == "clicked":
+                return bool(self.waiter.wait_for(row_unfollowed(user), timeout=5))
         
-        print(f"\nTotal followers: {len(self.followers)} users")
-        return self.followers
+        return None
     
-    def unfollow_non_followers(self, delay=3):
-        """Unfollow users who don't follow you back"""
-        non_followers = self.following - self.followers
+    def unfollow_non_followers(self, delay=3, non_followers=None):
+        """Unfollow users who don't follow you back
+        
+        non_followers defaults to following - followers; it can also be a
+        stream (see stream_non_mutuals) so unfollowing starts before the crawl ends.
+        """
+        if non_followers is None:
+            non_followers = self.non_mutuals()
+        total = len(non_followers) if hasattr(non_followers, "__len__") else None
         
-        if not non_followers:
+        if total == 0:
+            self.summary = {"account": self.username.lower(), "unfollowed": 0, "skipped": 0, "failed": []}
             print("\n" + "="*50)
             print("Everyone you follow follows you back!")
             print("="*50)
             return
         
         print("\n" + "="*50)
-        print(f"Found {len(non_followers)} users who don't follow you back")
+        if total is None:
+            print("Unfollowing users who don't follow you back as they're found")
+        else:
+            print(f"Found {total} users who don't follow you back")
         print("="*50)
         print("Starting unfollow process...\n")
         
         unfollowed_count = 0
+        skipped_count = 0
         failed_users = []
         
+        if self.unfollow_mode == "list" and total is not None:
+            # Work from the last page back, so unfollows don't shift rows on pages still to come
+            non_followers = sorted(non_followers, key=lambda u: self.following_pages.get(u, 0), reverse=True)
+        if self.journal and total is not None:
+            non_followers = list(non_followers)
+            self.journal.plan(non_followers, self.following_pages)
+        
         for i, user in enumerate(non_followers, 1):
-            try:
-                # Go to user's profile
-                self.driver.get(f"https://letterboxd.com/{user}/")
-                time.sleep(1.5)
-                
-                # Find the unfollow button - use the correct selector
+            progress = f"{i}/{total}" if total else str(i)
+            if self.journal and total is None:
+                self.journal.planned(user, self.following_pages.get(user))
+            self.supervisor.check()
+            with tracer.span("action.unfollow") as span:
                 try:
-                    unfollow_btn = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, "a.js-button-following"))
-                    )
-                    unfollow_btn.click()
-                    
-                    unfollowed_count += 1
-                    print(f"✓ Unfollowed: {user} ({i}/{len(non_followers)})")
+                    unfollowed = self.attempt_unfollow(user)
                     
-                    # Delay between unfollows to avoid rate limiting
-                    time.sleep(delay)
+                    if unfollowed == ALREADY_UNFOLLOWED:
+                        skipped_count += 1
+                        print(f"⊝ Already not following: {user} ({progress})")
+                    elif unfollowed:
+                        unfollowed_count += 1
+                        self.events.record(self.username, user, "unfollowed")
+                        print(f"✓ Unfollowed: {user} ({progress})")
+                    else:
+                        print(f"✗ Could not find unfollow button for {user} ({progress})")
+                        failed_users.append(user)
+                        span.fail()
                     
-                except TimeoutException:
-                    print(f"✗ Could not find unfollow button for {user} ({i}/{len(non_followers)})")
+                except DriverLost:
+                    raise
+                except Exception as e:
+                    error_msg = str(e)[:80]
+                    print(f"✗ Failed to unfollow {user}: {error_msg} ({progress})")
                     failed_users.append(user)
-                
-            except Exception as e:
-                error_msg = str(e)[:80]
-                print(f"✗ Failed to unfollow {user}: {error_msg} ({i}/{len(non_followers)})")
-                failed_users.append(user)
+                    span.fail()
+            
+            if self.journal:
+                if span.failed:
+                    self.journal.record("failed", user)
+                else:
+                    self.journal.record("skipped" if unfollowed == ALREADY_UNFOLLOWED else "done", user)
+            
+            if span.failed:
+                # A run of failures usually means we're being throttled
+                self.waiter.limiter.failure()
+            else:
+                self.waiter.limiter.success()
+                # Delay between unfollows to avoid rate limiting
+                time.sleep(delay)
         
         print("\n" + "="*50)
         print("SUMMARY")
         print("="*50)
-        print(f"Successfully unfollowed: {unfollowed_count}/{len(non_followers)} users")
+        tracer.count("unfollowed", unfollowed_count)
+        self.summary = {
+            "account": self.username.lower(),
+            "unfollowed": unfollowed_count,
+            "skipped": skipped_count,
+            "failed": failed_users,
+        }
+        if self.journal:
+            self.journal.finish(unfollowed=unfollowed_count, skipped=skipped_count, failed=len(failed_users))
+        print(f"Successfully unfollowed: {unfollowed_count}/{unfollowed_count + len(failed_users)} users")
+        if skipped_count:
+            print(f"Already not following: {skipped_count} users")
         if failed_users:
             print(f"Failed to unfollow: {len(failed_users)} users")
             print(f"Failed users: {', '.join(failed_users[:10])}")
@@ -225,28 +342,61 @@ class LetterboxdUnfollower:
                 print(f"  ... and {len(failed_users) - 10} more")
         print("="*50)
     
-    def run(self, delay_between_unfollows=3):
-        """Main execution flow"""
+    def run(self, delay_between_unfollows=3, max_unfollows=None, resume=False):
+        """Main execution flow
+        
+        With max_unfollows, the following list is streamed and unfollowing
+        starts right away, stopping the crawl once that many were found.
+        With resume, the last unfinished run's journal is picked up instead
+        of crawling: only the users it hadn't finished are processed.
+        
+        Returns the summary dict of the unfollow pass, or None if it didn't run.
+        """
+        tracer.reset()
         try:
             self.setup_driver()
             
-            if not self.login():
+            if not self.ensure_logged_in():
                 return
             
-            time.sleep(2)
+            state = find_resumable(self.username) if resume else None
+            if resume and not state:
+                print("No unfinished unfollow run to resume - starting a new one")
             
-            self.get_following()
-            self.get_followers()
+            if state:
+                self.journal = RunJournal(state.path)
+                self.following_pages.update(state.pages)
+                print(f"Resuming the run from {format_age(time.time() - state.started_at)} ago: "
+                      f"{state.count('done')} done, {len(state.remaining)} left")
+                self.unfollow_non_followers(delay=delay_between_unfollows, non_followers=state.remaining)
+                return
             
-            self.unfollow_non_followers(delay=delay_between_unfollows)
+            self.journal = RunJournal.create(self.username)
+            if max_unfollows:
+                self.unfollow_non_followers(
+                    delay=delay_between_unfollows, non_followers=self.stream_non_mutuals(max_unfollows)
+                )
+            else:
+                self.get_following_and_followers()
+                if self.followers_trusted():
+                    self.unfollow_non_followers(delay=delay_between_unfollows)
             
+        except KeyboardInterrupt:
+            print("\n\nInterrupted - progress is saved, choose resume next time to pick up where you left off")
+        
         except Exception as e:
             print(f"\nError during execution: {e}")
         
         finally:
-            if self.driver:
-                input("\nPress Enter to close browser...")
-                self.driver.quit()
+            if self.journal:
+                self.journal.close()
+            self.backend.close()
+            self.store.close()
+            self.events.close()
+            tracer.finish("unfollow")
+            self.close_driver()
+        
+        return self.summary
 
 
 
@@ -0,0 +1,57 @@
+def popcount(bitmap):
+    """Number of users in a bitmap"""
+    return bitmap.bit_count()
+
+
+class UserTable:
+    """Interns usernames to small integer ids so lists can be held as bitmaps
+
+    A list becomes one Python int with bit i set for user id i, so each
+    username string is kept once however many lists or snapshots mention
+    it, and &, | and & ~ run over whole lists at machine-word speed. The
+    set algebra only pays off once a list is compared more than once
+    (history, many snapshots, many accounts); building the bitmap costs
+    about as much as building a set.
+
+    Ids are handed out in first-seen order, so interning a list in list
+    order makes usernames() return results in that order too.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, username):
+        user_id = self.ids.get(username)
+        if user_id is None:
+            user_id = self.ids[username] = len(self.names)
+            self.names.append(username)
+        return user_id
+
+    def bitmap(self, usernames):
+        """Bitmap of an iterable of usernames, interning any new ones"""
+        if not hasattr(usernames, "__len__"):
+            usernames = list(usernames)
+        # Sized for the worst case (every name new) so the loop never has to grow it
+        bits = bytearray((len(self.names) + len(usernames)) // 8 + 1)
+        for user_id in map(self.intern, usernames):
+            bits[user_id >> 3] |= 1 << (user_id & 7)
+        return int.from_bytes(bits, "little")
+
+    def usernames(self, bitmap):
+        """Usernames in a bitmap, in id order"""
+        names = self.names
+        # Reversed binary string: character i is bit i
+        bits = bin(bitmap)[:1:-1]
+        result = []
+        position = bits.find("1")
+        while position != -1:
+            result.append(names[position])
+            position = bits.find("1", position + 1)
+        return result
+
+    def __contains__(self, username):
+        return username in self.ids
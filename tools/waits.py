@@ -0,0 +1,159 @@
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+import archive
+from ratelimit import is_throttle_title, limiter as shared_limiter
+from tracing import tracer
+
+FOLLOW_BUTTONS = (
+    "a.js-button-following, button.js-button-following, "
+    "a.js-button-follow, button.js-button-follow"
+)
+
+
+# Readiness conditions - each takes the driver and returns a truthy value once
+# the page type is usable. They go through execute_script so a poll is a
+# single round trip.
+
+def list_page_ready(driver):
+    """Person rows are present, or the page finished loading without any"""
+    return driver.execute_script(
+        "return document.querySelector('div.person-summary') !== null"
+        " || document.readyState === 'complete';"
+    )
+
+
+def pagination_ready(driver):
+    """Pagination has been rendered, or the page has none"""
+    return driver.execute_script(
+        "return document.querySelector('.pagination, a.next, a.previous') !== null"
+        " || document.readyState === 'complete';"
+    )
+
+
+def follow_button_ready(driver):
+    """A follow/following button is attached and visible"""
+    return driver.execute_script(
+        "var buttons = document.querySelectorAll(arguments[0]);"
+        "for (var i = 0; i < buttons.length; i++) {"
+        "  if (buttons[i].offsetParent !== null) { return true; }"
+        "}"
+        "return false;",
+        FOLLOW_BUTTONS,
+    )
+
+
+def following_button_visible(driver):
+    """The button has switched to the 'following' state"""
+    return driver.execute_script(
+        "var buttons = document.querySelectorAll("
+        "  'a.js-button-following, button.js-button-following');"
+        "for (var i = 0; i < buttons.length; i++) {"
+        "  if (buttons[i].offsetParent !== null) { return true; }"
+        "}"
+        "return false;"
+    )
+
+
+def login_complete(driver):
+    """The sign-in form was submitted and the site navigated away or showed an error"""
+    if "/sign-in" not in driver.current_url:
+        return True
+    return driver.execute_script(
+        "return document.querySelector('.form-error, .error, .errormessage') !== null;"
+    )
+
+
+class PageWaiter:
+    """Waits on page readiness instead of sleeping for a fixed time
+
+    The politeness floor is kept separate from readiness: navigations are
+    spaced at least min_delay seconds apart (measured from the start of the
+    previous navigation), but once that has passed a page is used as soon as
+    its readiness condition holds.
+
+    Navigations also take a token from the shared RateLimiter, and a
+    rate-limit/error page backs it off and is retried once.
+    """
+
+    def __init__(self, driver, timeout=10, min_delay=0.5, poll_interval=0.1, stats=None, limiter=None):
+        self.driver = driver
+        self.limiter = limiter or shared_limiter
+        # Optional DriverStats that gets the time of every navigation + readiness wait
+        self.stats = stats
+        self.timeout = timeout
+        self.min_delay = min_delay
+        self.poll_interval = poll_interval
+        self._last_navigation = 0.0
+
+    def pace(self):
+        """Sleep only for whatever is left of the politeness floor"""
+        remaining = self._last_navigation + self.min_delay - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        self._last_navigation = time.monotonic()
+
+    def wait_for(self, condition, timeout=None):
+        """Wait until condition(driver) is truthy, returns None on timeout"""
+        with tracer.span(f"wait.{getattr(condition, '__name__', 'condition')}") as span:
+            try:
+                return WebDriverWait(
+                    self.driver,
+                    self.timeout if timeout is None else timeout,
+                    poll_frequency=self.poll_interval,
+                ).until(condition)
+            except TimeoutException:
+                span.fail()
+                return None
+
+    def get(self, url, condition=None, timeout=None):
+        """Navigate to url respecting the floor, then wait for condition"""
+        for attempt in range(2):
+            with tracer.span("page.politeness"):
+                self.limiter.acquire()
+                self.pace()
+            started = time.monotonic()
+            with tracer.span("page.navigate"):
+                self.driver.get(url)
+            if not is_throttle_title(self.driver.title):
+                break
+            if attempt == 0:
+                self.limiter.throttled("rate-limit page")
+        ready = True if condition is None else self.wait_for(condition, timeout)
+        if archive.recorder is not None:
+            archive.record(url, self.driver.page_source, source="browser")
+        if self.stats is not None:
+            self.stats.record_page_load(time.monotonic() - started)
+        return ready
+
+
+# Finds the list row (table row) for arguments[0], the username
+FIND_ROW_JS = """
+var findRow = function (username) {
+    var links = document.querySelectorAll('div.person-summary a.avatar');
+    for (var i = 0; i < links.length; i++) {
+        var slug = links[i].getAttribute('href').replace(/^https?:\\/\\/[^\\/]+/, '').replace(/\\//g, '');
+        if (slug === username) {
+            return links[i].closest('tr') || links[i].closest('li') || links[i].parentNode.parentNode;
+        }
+    }
+    return null;
+};
+"""
+
+
+def row_unfollowed(username):
+    """Condition: the row's 'following' button has gone (the unfollow took effect)"""
+    def condition(driver):
+        return driver.execute_script(
+            FIND_ROW_JS +
+            "var row = findRow(arguments[0]);"
+            "if (!row) { return false; }"
+            "var button = row.querySelector('.js-button-following');"
+            "return !button || button.offsetParent === null;",
+            username,
+        )
+    condition.__name__ = "row_unfollowed"
+    return condition